@@ -1,24 +1,160 @@
 from flask import Flask, request, render_template, send_from_directory, jsonify
+from flask.json.provider import JSONProvider
 import boto3
-import json
+from botocore.config import Config as BotoConfig
+import orjson
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
 from datetime import datetime
-from utils import validate_features, preprocess_features, format_prediction_result
+from cachetools import TTLCache
+from utils import (validate_features, preprocess_features, format_prediction_result,
+                   parse_form_features, pack_features)
+from batching import MicroBatcher
+from database import get_cache
 from config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster (de)serialization."""
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
 
 # AWS SageMaker Endpoint Name (replace with your endpoint name)
 ENDPOINT_NAME = Config.SAGEMAKER_ENDPOINT
 
-# Initialize AWS SageMaker runtime client
-sagemaker_runtime = boto3.client('sagemaker-runtime', region_name=Config.AWS_REGION)
+# Static invoke_endpoint parameters; only the request body varies per call
+INVOKE_PARAMS = {
+    'EndpointName': ENDPOINT_NAME,
+    'ContentType': 'application/json'
+}
+
+# SageMaker runtime client configuration: keep-alive and a larger connection pool
+boto_config = BotoConfig(
+    region_name=Config.AWS_REGION,
+    tcp_keepalive=True,
+    max_pool_connections=Config.SAGEMAKER_MAX_POOL_CONNECTIONS,
+    connect_timeout=Config.SAGEMAKER_CONNECT_TIMEOUT,
+    read_timeout=Config.SAGEMAKER_READ_TIMEOUT,
+    retries={'max_attempts': Config.SAGEMAKER_MAX_ATTEMPTS, 'mode': 'adaptive'}
+)
+
+# The client is created lazily so that each (forked) worker process builds
+# its own connection pool instead of inheriting the parent's sockets.
+_sagemaker_runtime = None
+_sagemaker_runtime_lock = threading.Lock()
+
+def get_sagemaker_runtime():
+    """Return this process's SageMaker runtime client, creating it on first use."""
+    global _sagemaker_runtime
+    if _sagemaker_runtime is None:
+        with _sagemaker_runtime_lock:
+            if _sagemaker_runtime is None:
+                _sagemaker_runtime = boto3.client('sagemaker-runtime', config=boto_config)
+    return _sagemaker_runtime
+
+# Control-plane client for DescribeEndpoint (the runtime client cannot describe endpoints)
+_sagemaker_client = None
+
+def get_sagemaker_client():
+    """Return this process's SageMaker control-plane client, creating it on first use."""
+    global _sagemaker_client
+    if _sagemaker_client is None:
+        with _sagemaker_runtime_lock:
+            if _sagemaker_client is None:
+                _sagemaker_client = boto3.client('sagemaker', config=boto_config)
+    return _sagemaker_client
+
+def _invoke_sagemaker(rows: list) -> list:
+    """
+    Invoke the SageMaker endpoint once for a list of processed feature rows
+    and return the decoded predictions.
+    Handlers reach it through prediction_batcher, which checks that one
+    prediction comes back per row.
+    """
+    # Convert input data into model's expected JSON format (bytes)
+    payload_json = orjson.dumps(rows)
+    
+    # Call SageMaker endpoint
+    response = get_sagemaker_runtime().invoke_endpoint(Body=payload_json, **INVOKE_PARAMS)
+    
+    # Parse the prediction response straight from the body bytes; closing the
+    # stream returns the connection to the pool even if the read fails
+    with response['Body'] as body:
+        body_bytes = body.read()
+    return orjson.loads(body_bytes)
+
+# Coalesces concurrent single predictions into multi-row endpoint calls
+prediction_batcher = MicroBatcher(_invoke_sagemaker,
+                                  batch_size=Config.PREDICTION_BATCH_SIZE,
+                                  batch_timeout_ms=Config.PREDICTION_BATCH_TIMEOUT_MS)
+
+# In-process cache of recent predictions, keyed by the packed processed features
+_prediction_cache = TTLCache(maxsize=Config.PREDICTION_CACHE_SIZE, ttl=Config.PREDICTION_CACHE_TTL)
+_prediction_cache_lock = threading.Lock()
+
+def _cache_get(feature_key: bytes):
+    """Return the cached prediction for a packed feature key, or None."""
+    with _prediction_cache_lock:
+        return _prediction_cache.get(feature_key)
+
+def _cache_put(feature_key: bytes, prediction: int):
+    """Store a prediction for a packed feature key."""
+    with _prediction_cache_lock:
+        _prediction_cache[feature_key] = prediction
+
+def _store_prediction(feature_key: bytes, future: Future):
+    """Add a completed endpoint prediction to the in-process cache."""
+    if future.exception() is None:
+        _cache_put(feature_key, future.result())
+
+def _cached_submit(processed_features: list) -> Future:
+    """
+    Return a future for the model prediction of processed features.
+    Feature vectors equal to one seen within the cache TTL resolve immediately
+    from memory; misses are queued for the next micro-batch without blocking.
+    """
+    feature_key = pack_features(processed_features)
+    prediction = _cache_get(feature_key)
+    if prediction is not None:
+        logger.info("Prediction served from cache")
+        future = Future()
+        future.set_result(prediction)
+        return future
+    
+    future = prediction_batcher.submit(processed_features)
+    future.add_done_callback(lambda f: _store_prediction(feature_key, f))
+    return future
+
+def _cached_invoke(processed_features: list) -> int:
+    """Return the model prediction for processed features, blocking until ready."""
+    return _cached_submit(processed_features).result()
+
+def _finish_async_task(task_id: str, future: Future):
+    """Store the outcome of an asynchronous prediction where every worker can read it."""
+    error = future.exception()
+    if error is not None:
+        get_cache().finish_task(task_id, error_message=str(error))
+    else:
+        get_cache().finish_task(task_id, prediction=future.result())
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -35,28 +171,7 @@ def index():
         try:
             logger.info("Processing prediction request")
             # Collect input data from form
-            features = [
-                int(request.form['battery_power']),
-                int(request.form['blue']),
-                float(request.form['clock_speed']),
-                int(request.form['dual_sim']),
-                int(request.form['fc']),
-                int(request.form['four_g']),
-                int(request.form['int_memory']),
-                float(request.form['m_dep']),
-                int(request.form['mobile_wt']),
-                int(request.form['n_cores']),
-                int(request.form['pc']),
-                int(request.form['px_height']),
-                int(request.form['px_width']),
-                int(request.form['ram']),
-                int(request.form['sc_h']),
-                int(request.form['sc_w']),
-                int(request.form['talk_time']),
-                int(request.form['three_g']),
-                int(request.form['touch_screen']),
-                int(request.form['wifi']),
-            ]
+            features = parse_form_features(request.form)
             
             # Validate input features
             is_valid, error_message = validate_features(features)
@@ -66,21 +181,10 @@ def index():
             # Preprocess features
             processed_features = preprocess_features(features)
             
-            # Convert input data into model's expected JSON format
-            payload_json = json.dumps([processed_features])
-            
-            # Call SageMaker endpoint
-            start_time = datetime.now()
-            response = sagemaker_runtime.invoke_endpoint(
-                EndpointName=ENDPOINT_NAME,
-                ContentType="application/json",
-                Body=payload_json
-            )
-            end_time = datetime.now()
-            
-            # Parse the prediction response
-            prediction = json.loads(response['Body'].read().decode())[0]
-            prediction_time = (end_time - start_time).total_seconds() * 1000
+            # Get prediction (cached or from SageMaker endpoint)
+            start_ns = time.monotonic_ns()
+            prediction = _cached_invoke(processed_features)
+            prediction_time = (time.monotonic_ns() - start_ns) / 1e6
             
             logger.info(f"Prediction received: {prediction} in {prediction_time:.2f}ms")
             
@@ -125,18 +229,8 @@ def api_predict():
         # Preprocess features
         processed_features = preprocess_features(features)
         
-        # Convert to model format
-        payload_json = json.dumps([processed_features])
-        
-        # Call SageMaker endpoint
-        response = sagemaker_runtime.invoke_endpoint(
-            EndpointName=ENDPOINT_NAME,
-            ContentType="application/json",
-            Body=payload_json
-        )
-        
-        # Parse response
-        prediction = json.loads(response['Body'].read().decode())[0]
+        # Get prediction (cached or from SageMaker endpoint)
+        prediction = _cached_invoke(processed_features)
         prediction_text, prediction_image = format_prediction_result(prediction)
         
         return jsonify({
@@ -151,6 +245,81 @@ def api_predict():
         logger.error(f"API prediction error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/predict/async', methods=['POST'])
+def api_predict_async():
+    """
+    API endpoint for asynchronous single prediction.
+    Queues the prediction and immediately returns a task id
+    that can be polled at /api/result/<task_id>.
+    """
+    try:
+        data = request.get_json()
+        if not data or 'features' not in data:
+            return jsonify({'error': 'Missing features array'}), 400
+        
+        features = data['features']
+        
+        # Validate input features
+        is_valid, error_message = validate_features(features)
+        if not is_valid:
+            return jsonify({'error': error_message}), 400
+        
+        # Preprocess features
+        processed_features = preprocess_features(features)
+        
+        # Queue prediction without blocking this worker; the task lives in the
+        # shared SQLite database so any worker can answer the poll
+        task_id = uuid.uuid4().hex
+        if not get_cache().create_task(task_id, features, Config.ASYNC_TASK_TTL):
+            return jsonify({'error': 'Failed to queue prediction'}), 500
+        future = _cached_submit(processed_features)
+        future.add_done_callback(lambda f: _finish_async_task(task_id, f))
+        
+        return jsonify({
+            'task_id': task_id,
+            'status': 'pending',
+            'status_url': f'/api/result/{task_id}',
+            'timestamp': datetime.now().isoformat()
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"API async prediction error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/result/<task_id>', methods=['GET'])
+def api_result(task_id):
+    """
+    API endpoint for polling the result of an asynchronous prediction.
+    """
+    try:
+        task = get_cache().get_task(task_id, Config.ASYNC_TASK_TTL)
+    except Exception as e:
+        logger.error(f"API result lookup error: {e}")
+        return jsonify({'error': str(e)}), 500
+    
+    if task is None:
+        return jsonify({'error': 'Unknown or expired task id'}), 404
+    
+    if task['status'] == 'pending':
+        return jsonify({'task_id': task_id, 'status': 'pending'})
+    
+    if task['status'] == 'failed':
+        return jsonify({'task_id': task_id, 'status': 'failed', 'error': task['error_message']}), 500
+    
+    features = task['features']
+    prediction = task['prediction']
+    prediction_text, prediction_image = format_prediction_result(prediction)
+    
+    return jsonify({
+        'task_id': task_id,
+        'status': 'completed',
+        'prediction': prediction,
+        'prediction_text': prediction_text,
+        'prediction_image': prediction_image,
+        'confidence_score': calculate_confidence_score(features, prediction),
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/batch-predict', methods=['POST'])
 def api_batch_predict():
     """
@@ -169,7 +338,12 @@ def api_batch_predict():
         if len(features_list) > 100:  # Limit batch size
             return jsonify({'error': 'Batch size cannot exceed 100'}), 400
         
+        # Phase 1: validate and preprocess, resolving cached rows immediately
         results = []
+        predictions = {}
+        pending_indices = []
+        pending_keys = []
+        pending_rows = []
         for i, features in enumerate(features_list):
             try:
                 # Validate features
@@ -184,27 +358,14 @@ def api_batch_predict():
                 # Preprocess features
                 processed_features = preprocess_features(features)
                 
-                # Convert to model format
-                payload_json = json.dumps([processed_features])
-                
-                # Call SageMaker endpoint
-                response = sagemaker_runtime.invoke_endpoint(
-                    EndpointName=ENDPOINT_NAME,
-                    ContentType="application/json",
-                    Body=payload_json
-                )
-                
-                # Parse response
-                prediction = json.loads(response['Body'].read().decode())[0]
-                prediction_text, prediction_image = format_prediction_result(prediction)
-                
-                results.append({
-                    'index': i,
-                    'prediction': prediction,
-                    'prediction_text': prediction_text,
-                    'prediction_image': prediction_image,
-                    'confidence_score': calculate_confidence_score(features, prediction)
-                })
+                feature_key = pack_features(processed_features)
+                prediction = _cache_get(feature_key)
+                if prediction is not None:
+                    predictions[i] = prediction
+                else:
+                    pending_indices.append(i)
+                    pending_keys.append(feature_key)
+                    pending_rows.append(processed_features)
                 
             except Exception as e:
                 results.append({
@@ -212,6 +373,31 @@ def api_batch_predict():
                     'error': str(e)
                 })
         
+        # Phase 2: predict all uncached rows with a single SageMaker call
+        if pending_rows:
+            try:
+                batch_predictions = prediction_batcher.invoke(pending_rows)
+                for i, feature_key, prediction in zip(pending_indices, pending_keys, batch_predictions):
+                    _cache_put(feature_key, prediction)
+                    predictions[i] = prediction
+            except Exception as e:
+                logger.error(f"Batch prediction error: {e}")
+                results.extend({'index': i, 'error': str(e)} for i in pending_indices)
+        
+        for i, prediction in predictions.items():
+            features = features_list[i]
+            prediction_text, prediction_image = format_prediction_result(prediction)
+            
+            results.append({
+                'index': i,
+                'prediction': prediction,
+                'prediction_text': prediction_text,
+                'prediction_image': prediction_image,
+                'confidence_score': calculate_confidence_score(features, prediction)
+            })
+        
+        results.sort(key=lambda r: r['index'])
+        
         return jsonify({
             'results': results,
             'total_processed': len(features_list),
@@ -223,15 +409,49 @@ def api_batch_predict():
         logger.error(f"Batch prediction error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Last endpoint status (or probe error), refreshed at most once per
+# HEALTH_CACHE_TTL, or HEALTH_FAILURE_TTL after a failed probe
+_endpoint_status_cache = {'ts': 0.0, 'status': None, 'error': None, 'refreshing': False}
+_endpoint_status_lock = threading.Lock()
+
+def _get_endpoint_status() -> str:
+    """
+    Return the SageMaker endpoint status, reusing the cached value while fresh.
+    The lock only guards the cache: DescribeEndpoint runs outside it, and while
+    one probe refreshes, concurrent probes get the previous status.
+    """
+    with _endpoint_status_lock:
+        cache = _endpoint_status_cache
+        ttl = Config.HEALTH_FAILURE_TTL if cache['error'] else Config.HEALTH_CACHE_TTL
+        fresh = time.monotonic() - cache['ts'] < ttl
+        if (fresh or cache['refreshing']) and cache['error']:
+            raise RuntimeError(cache['error'])
+        if (fresh or cache['refreshing']) and cache['status'] is not None:
+            return cache['status']
+        cache['refreshing'] = True
+    
+    try:
+        response = get_sagemaker_client().describe_endpoint(EndpointName=ENDPOINT_NAME)
+        status, error = response['EndpointStatus'], None
+    except Exception as e:
+        status, error = None, str(e)
+    
+    with _endpoint_status_lock:
+        _endpoint_status_cache.update(ts=time.monotonic(), status=status,
+                                      error=error, refreshing=False)
+    
+    if error:
+        raise RuntimeError(error)
+    return status
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint for monitoring.
     """
     try:
-        # Test SageMaker endpoint connectivity
-        response = sagemaker_runtime.describe_endpoint(EndpointName=ENDPOINT_NAME)
-        endpoint_status = response['EndpointStatus']
+        # Test SageMaker endpoint connectivity (cached for HEALTH_CACHE_TTL seconds)
+        endpoint_status = _get_endpoint_status()
         
         return jsonify({
             'status': 'healthy' if endpoint_status == 'InService' else 'degraded',
@@ -259,14 +479,15 @@ def calculate_confidence_score(features, prediction):
     clock_speed = features[2]
     
     # Higher values generally indicate better phones
-    base_score = min(100, (battery_power / 5000) * 30 + (ram / 8000) * 40 + (clock_speed / 3) * 30)
+    # (weights fold battery/5000*30, ram/8000*40 and clock/3*30)
+    base_score = battery_power * 0.006 + ram * 0.005 + clock_speed * 10.0
+    base_score = 100.0 if base_score > 100.0 else base_score
     
-    # Add some randomness to make it realistic
-    import random
-    random.seed(sum(features) + prediction)
-    variation = random.uniform(-10, 10)
+    # Add deterministic jitter in [-10, 10] derived from a hash, so no RNG state is touched
+    variation = ((hash((battery_power, ram, clock_speed, prediction)) & 0xFFFF) / 0xFFFF) * 20.0 - 10.0
     
-    return max(0, min(100, base_score + variation))
+    score = base_score + variation
+    return 0.0 if score < 0.0 else (100.0 if score > 100.0 else score)
 
 @app.route('/favicon.ico')
 def favicon():
@@ -274,4 +495,5 @@ def favicon():
     return send_from_directory('static', 'favicon.ico', mimetype='image/vnd.microsoft.icon')
 
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
     app.run(host='0.0.0.0', port=80, debug=app.config['DEBUG'])
@@ -0,0 +1,82 @@
+"""
+Micro-batching of prediction requests before invoking the model endpoint.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one endpoint call."""
+    
+    def __init__(self, invoke_fn: Callable[[List[list]], list],
+                 batch_size: int = 32, batch_timeout_ms: int = 20):
+        self.invoke_fn = invoke_fn
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout_ms / 1000.0
+        self.pending = queue.Queue()
+        
+        # The worker thread is started lazily so that forked processes
+        # (e.g. gunicorn workers) each start their own.
+        self.worker_thread = None
+        self.worker_lock = threading.Lock()
+    
+    def submit(self, features: list) -> Future:
+        """Queue a single feature row and return a future for its prediction."""
+        self._ensure_worker()
+        future = Future()
+        self.pending.put((features, future))
+        return future
+    
+    def _ensure_worker(self):
+        """Start the background batching thread if it is not running."""
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            return
+        with self.worker_lock:
+            if self.worker_thread is None or not self.worker_thread.is_alive():
+                self.worker_thread = threading.Thread(target=self._batch_loop, daemon=True)
+                self.worker_thread.start()
+                logger.info("Prediction batching started")
+    
+    def _batch_loop(self):
+        """Background loop collecting queued rows into batches."""
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.batch_timeout
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._process_batch(batch)
+    
+    def invoke(self, rows: List[list]) -> list:
+        """Invoke the endpoint directly for rows, checking one prediction comes back per row."""
+        predictions = self.invoke_fn(rows)
+        if len(predictions) != len(rows):
+            raise ValueError(f"Expected {len(rows)} predictions, got {len(predictions)}")
+        return predictions
+    
+    def _process_batch(self, batch: List[Tuple[list, Future]]):
+        """Invoke the endpoint once for the batch and resolve each future."""
+        try:
+            predictions = self.invoke([features for features, _ in batch])
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        
+        logger.info(f"Processed prediction batch of {len(batch)}")
+        for (_, future), prediction in zip(batch, predictions):
+            future.set_result(prediction)
@@ -13,8 +13,7 @@ from pathlib import Path
 # Add current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from database import prediction_cache
-from monitoring import metrics_collector
+# database and monitoring are imported inside the commands that use them
 from config import Config
 
 # Configure logging
@@ -26,6 +25,12 @@ def show_status():
     print("🔍 Checking application status...")
     
     try:
+        from database import get_cache
+        from monitoring import get_metrics_collector
+        
+        prediction_cache = get_cache()
+        metrics_collector = get_metrics_collector()
+        
         # Check database
         db_stats = prediction_cache.get_cache_stats()
         print(f"✅ Database: Connected (Size: {db_stats.get('cache_size_mb', 0)} MB)")
@@ -57,6 +62,9 @@ def show_cache_stats():
     print("=" * 40)
     
     try:
+        from database import get_cache
+        prediction_cache = get_cache()
+        
         stats = prediction_cache.get_cache_stats()
         
         print(f"Total Predictions: {stats.get('total_predictions', 0)}")
@@ -78,6 +86,9 @@ def cleanup_cache(days: int):
     print(f"🧹 Cleaning up cache entries older than {days} days...")
     
     try:
+        from database import get_cache
+        prediction_cache = get_cache()
+        
         deleted_count = prediction_cache.cleanup_old_predictions(days)
         print(f"✅ Cleaned up {deleted_count} old predictions")
         
@@ -87,12 +98,34 @@ def cleanup_cache(days: int):
     except Exception as e:
         print(f"❌ Cache cleanup failed: {e}")
 
+def summarize(values):
+    """Return (min, max, avg) of an iterable in a single pass, or None if empty."""
+    count = 0
+    total = 0.0
+    low = high = None
+    for value in values:
+        if count == 0:
+            low = high = value
+        elif value < low:
+            low = value
+        elif value > high:
+            high = value
+        total += value
+        count += 1
+    
+    if count == 0:
+        return None
+    return low, high, total / count
+
 def show_metrics(hours: int = 24):
     """Show application metrics."""
     print(f"📈 Application Metrics (Last {hours} hours):")
     print("=" * 50)
     
     try:
+        from monitoring import get_metrics_collector
+        metrics_collector = get_metrics_collector()
+        
         current = metrics_collector.get_current_metrics()
         history = metrics_collector.get_metrics_history(hours)
         
@@ -106,23 +139,23 @@ def show_metrics(hours: int = 24):
         
         if history['system']:
             print(f"\n📊 System Metrics ({len(history['system'])} data points):")
-            cpu_values = [m['cpu_percent'] for m in history['system']]
-            memory_values = [m['memory_percent'] for m in history['system']]
+            cpu = summarize(m['cpu_percent'] for m in history['system'])
+            memory = summarize(m['memory_percent'] for m in history['system'])
             
-            if cpu_values:
-                print(f"   CPU: Min {min(cpu_values):.1f}%, Max {max(cpu_values):.1f}%, Avg {sum(cpu_values)/len(cpu_values):.1f}%")
-            if memory_values:
-                print(f"   Memory: Min {min(memory_values):.1f}%, Max {max(memory_values):.1f}%, Avg {sum(memory_values)/len(memory_values):.1f}%")
+            if cpu:
+                print(f"   CPU: Min {cpu[0]:.1f}%, Max {cpu[1]:.1f}%, Avg {cpu[2]:.1f}%")
+            if memory:
+                print(f"   Memory: Min {memory[0]:.1f}%, Max {memory[1]:.1f}%, Avg {memory[2]:.1f}%")
         
         if history['application']:
             print(f"\n📱 Application Metrics ({len(history['application'])} data points):")
-            request_values = [m['total_requests'] for m in history['application']]
-            response_values = [m['average_response_time'] for m in history['application']]
+            requests = summarize(m['total_requests'] for m in history['application'])
+            response = summarize(m['average_response_time'] for m in history['application'])
             
-            if request_values:
-                print(f"   Requests: Min {min(request_values)}, Max {max(request_values)}, Avg {sum(request_values)/len(request_values):.1f}")
-            if response_values:
-                print(f"   Response Time: Min {min(response_values):.2f}ms, Max {max(response_values):.2f}ms, Avg {sum(response_values)/len(response_values):.2f}ms")
+            if requests:
+                print(f"   Requests: Min {requests[0]}, Max {requests[1]}, Avg {requests[2]:.1f}")
+            if response:
+                print(f"   Response Time: Min {response[0]:.2f}ms, Max {response[1]:.2f}ms, Avg {response[2]:.2f}ms")
         
     except Exception as e:
         print(f"❌ Failed to get metrics: {e}")
@@ -133,9 +166,12 @@ def export_data(output_file: str, data_type: str):
     
     try:
         if data_type == 'metrics':
-            metrics_collector.export_metrics(output_file)
+            from monitoring import get_metrics_collector
+            get_metrics_collector().export_metrics(output_file)
         elif data_type == 'cache':
             # Export cache data
+            from database import get_cache
+            prediction_cache = get_cache()
             stats = prediction_cache.get_cache_stats()
             with open(output_file, 'w') as f:
                 json.dump(stats, f, indent=2)
@@ -154,6 +190,9 @@ def show_errors(limit: int = 10):
     print("=" * 40)
     
     try:
+        from monitoring import get_metrics_collector
+        metrics_collector = get_metrics_collector()
+        
         current_metrics = metrics_collector.get_current_metrics()
         if current_metrics and 'errors' in current_metrics:
             errors = current_metrics['errors']['recent_errors'][-limit:]
@@ -174,6 +213,16 @@ def show_errors(limit: int = 10):
     except Exception as e:
         print(f"❌ Failed to get error logs: {e}")
 
+# Command name -> handler taking the parsed arguments
+COMMANDS = {
+    'status': lambda args: show_status(),
+    'cache-stats': lambda args: show_cache_stats(),
+    'cleanup-cache': lambda args: cleanup_cache(args.days),
+    'metrics': lambda args: show_metrics(args.hours),
+    'export': lambda args: export_data(args.output, args.type),
+    'errors': lambda args: show_errors(args.limit),
+}
+
 def main():
     """Main CLI function."""
     parser = argparse.ArgumentParser(
@@ -222,21 +271,7 @@ Examples:
         return
     
     try:
-        if args.command == 'status':
-            show_status()
-        elif args.command == 'cache-stats':
-            show_cache_stats()
-        elif args.command == 'cleanup-cache':
-            cleanup_cache(args.days)
-        elif args.command == 'metrics':
-            show_metrics(args.hours)
-        elif args.command == 'export':
-            export_data(args.output, args.type)
-        elif args.command == 'errors':
-            show_errors(args.limit)
-        else:
-            print(f"❌ Unknown command: {args.command}")
-            parser.print_help()
+        COMMANDS[args.command](args)
             
     except KeyboardInterrupt:
         print("\n⏹️  Operation cancelled by user")
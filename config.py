@@ -11,10 +11,38 @@ class Config:
     AWS_REGION = os.environ.get('AWS_REGION', 'ap-south-1')
     SAGEMAKER_ENDPOINT = os.environ.get('SAGEMAKER_ENDPOINT', 'Custom-sklearn-model-2024-11-19-07-30-02')
     
+    # SageMaker Runtime Client Configuration
+    SAGEMAKER_MAX_POOL_CONNECTIONS = int(os.environ.get('SAGEMAKER_MAX_POOL_CONNECTIONS', 50))
+    SAGEMAKER_CONNECT_TIMEOUT = int(os.environ.get('SAGEMAKER_CONNECT_TIMEOUT', 3))  # seconds
+    SAGEMAKER_READ_TIMEOUT = int(os.environ.get('SAGEMAKER_READ_TIMEOUT', 30))  # seconds
+    SAGEMAKER_MAX_ATTEMPTS = int(os.environ.get('SAGEMAKER_MAX_ATTEMPTS', 3))
+    
     # Application Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'static'
     
+    # Prediction Cache Configuration
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', 3600))  # seconds
+    
+    # Prediction Micro-batching Configuration
+    PREDICTION_BATCH_SIZE = int(os.environ.get('PREDICTION_BATCH_SIZE', 32))
+    PREDICTION_BATCH_TIMEOUT_MS = int(os.environ.get('PREDICTION_BATCH_TIMEOUT_MS', 20))
+    
+    # Asynchronous Prediction Configuration
+    ASYNC_TASK_TTL = int(os.environ.get('ASYNC_TASK_TTL', 600))  # seconds
+    
+    # Health Check Configuration
+    HEALTH_CACHE_TTL = int(os.environ.get('HEALTH_CACHE_TTL', 30))  # seconds
+    HEALTH_FAILURE_TTL = int(os.environ.get('HEALTH_FAILURE_TTL', 5))  # seconds
+    
+    # Metrics Collection Configuration
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_CPU_INTERVAL = int(os.environ.get('METRICS_CPU_INTERVAL', 30))  # seconds
+    METRICS_DISK_INTERVAL = int(os.environ.get('METRICS_DISK_INTERVAL', 300))  # seconds
+    METRICS_NET_INTERVAL = int(os.environ.get('METRICS_NET_INTERVAL', 60))  # seconds
+    METRICS_SNAPSHOT_TTL = int(os.environ.get('METRICS_SNAPSHOT_TTL', 1))  # seconds
+    
     # Logging Configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -25,4 +53,11 @@ class Config:
     MIN_RAM = 0
     MAX_RAM = 100000
     MIN_CLOCK_SPEED = 0.0
-    MAX_CLOCK_SPEED = 10.0 
\ No newline at end of file
+    MAX_CLOCK_SPEED = 10.0
+    
+    # Range-checked features as (feature index, label, min, max), checked in order
+    FEATURE_RANGES = (
+        (0, 'Battery power', MIN_BATTERY_POWER, MAX_BATTERY_POWER),
+        (2, 'Clock speed', MIN_CLOCK_SPEED, MAX_CLOCK_SPEED),
+        (13, 'RAM', MIN_RAM, MAX_RAM),
+    ) 
\ No newline at end of file
@@ -2,120 +2,286 @@
 Database module for caching predictions and managing user sessions.
 """
 
+import os
+import time
+import queue
+import atexit
 import sqlite3
 import json
 import logging
+import threading
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import hashlib
+from utils import pack_features
 
 logger = logging.getLogger(__name__)
 
+# Per-connection SQLite tuning (journal_mode=WAL is set once in init_database)
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',
+    'PRAGMA mmap_size=268435456',
+)
+
+# Statement cache size per connection (sqlite3 default is 128)
+CACHED_STATEMENTS = 256
+
+# In-process LRU of recently read predictions in front of SQLite
+MEMORY_CACHE_SIZE = 1024
+
+# Deferred access_count bumps are handed to the writer thread once this many
+# hits accumulate, or on the first hit after the interval (seconds) has passed
+HIT_FLUSH_THRESHOLD = 256
+HIT_FLUSH_INTERVAL = 5
+
+# Stored in PRAGMA user_version; bump whenever SCHEMA_SQL changes
+CURRENT_SCHEMA_VERSION = 3
+
+# Full schema, applied by init_database whenever user_version is behind
+SCHEMA_SQL = f'''
+    BEGIN;
+    
+    CREATE TABLE IF NOT EXISTS predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        feature_hash TEXT UNIQUE NOT NULL,
+        features BLOB NOT NULL,
+        prediction INTEGER NOT NULL,
+        prediction_text TEXT NOT NULL,
+        confidence_score REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        access_count INTEGER DEFAULT 1,
+        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT UNIQUE NOT NULL,
+        user_agent TEXT,
+        ip_address TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        prediction_count INTEGER DEFAULT 0
+    );
+    
+    CREATE TABLE IF NOT EXISTS prediction_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        feature_hash TEXT,
+        prediction INTEGER,
+        response_time_ms REAL,
+        success BOOLEAN,
+        error_message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Asynchronous prediction tasks, shared by every worker process
+    CREATE TABLE IF NOT EXISTS async_tasks (
+        task_id TEXT PRIMARY KEY,
+        features TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        prediction INTEGER,
+        error_message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Covers SQL_SELECT_PRED so lookups never touch the table itself; plain
+    -- feature_hash lookups are served by the UNIQUE index, so idx_feature_hash goes
+    CREATE INDEX IF NOT EXISTS idx_pred_lookup ON predictions(
+        feature_hash, prediction, prediction_text, confidence_score, created_at, access_count
+    );
+    DROP INDEX IF EXISTS idx_feature_hash;
+    CREATE INDEX IF NOT EXISTS idx_created_at ON predictions(created_at);
+    CREATE INDEX IF NOT EXISTS idx_session_id ON user_sessions(session_id);
+    CREATE INDEX IF NOT EXISTS idx_task_created_at ON async_tasks(created_at);
+    
+    PRAGMA user_version = {CURRENT_SCHEMA_VERSION};
+    
+    COMMIT;
+'''
+
+# Session updates and prediction logs go through a bounded queue drained by one
+# writer thread, up to WRITE_BATCH_SIZE rows or WRITE_BATCH_TIMEOUT seconds per transaction
+WRITE_QUEUE_SIZE = 4096
+WRITE_BATCH_SIZE = 128
+WRITE_BATCH_TIMEOUT = 0.01
+
+# Queued by _drain_writes to make the writer thread exit after its current batch
+_WRITER_STOP = object()
+
+# Old predictions are deleted in chunks so readers are not starved by one long write
+CLEANUP_CHUNK_SIZE = 10000
+
+# Hot-path SQL, defined once so every call reuses the connection's prepared statement
+SQL_UPSERT_PRED = '''
+    INSERT INTO predictions
+    (feature_hash, features, prediction, prediction_text, confidence_score)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(feature_hash) DO UPDATE SET
+        access_count = access_count + 1,
+        last_accessed = CURRENT_TIMESTAMP
+'''
+
+# The planner would otherwise pick the UNIQUE constraint's index and then read the table
+SQL_SELECT_PRED = '''
+    SELECT prediction, prediction_text, confidence_score,
+           created_at, access_count
+    FROM predictions INDEXED BY idx_pred_lookup
+    WHERE feature_hash = ?
+'''
+
+SQL_ADD_HITS = '''
+    UPDATE predictions
+    SET access_count = access_count + ?,
+        last_accessed = CURRENT_TIMESTAMP
+    WHERE feature_hash = ?
+'''
+
+SQL_DELETE_OLD_PREDS = '''
+    DELETE FROM predictions
+    WHERE id IN (
+        SELECT id FROM predictions
+        WHERE created_at < datetime('now', ?)
+        LIMIT ?
+    )
+'''
+
+SQL_CACHE_STATS = '''
+    SELECT COUNT(*),
+           COALESCE(SUM(access_count), 0),
+           SUM(CASE WHEN created_at > datetime('now', '-1 day') THEN 1 ELSE 0 END),
+           AVG(confidence_score)
+    FROM predictions
+'''
+
+SQL_INSERT_SESSION = '''
+    INSERT OR REPLACE INTO user_sessions
+    (session_id, user_agent, ip_address, last_activity)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
+SQL_UPDATE_SESSION = '''
+    UPDATE user_sessions
+    SET last_activity = CURRENT_TIMESTAMP,
+        prediction_count = prediction_count + 1
+    WHERE session_id = ?
+'''
+
+SQL_INSERT_LOG = '''
+    INSERT INTO prediction_logs
+    (session_id, feature_hash, prediction, response_time_ms,
+     success, error_message)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SQL_INSERT_TASK = '''
+    INSERT INTO async_tasks (task_id, features) VALUES (?, ?)
+'''
+
+SQL_FINISH_TASK = '''
+    UPDATE async_tasks
+    SET status = ?, prediction = ?, error_message = ?
+    WHERE task_id = ?
+'''
+
+SQL_SELECT_TASK = '''
+    SELECT features, status, prediction, error_message
+    FROM async_tasks
+    WHERE task_id = ? AND created_at > datetime('now', ?)
+'''
+
+SQL_DELETE_EXPIRED_TASKS = '''
+    DELETE FROM async_tasks WHERE created_at <= datetime('now', ?)
+'''
+
+def _hash_packed(packed: bytes) -> str:
+    """Hash packed feature bytes into the feature_hash key."""
+    return hashlib.blake2b(packed, digest_size=8).hexdigest()
+
 class PredictionCache:
     """SQLite-based cache for storing prediction results."""
     
     def __init__(self, db_path: str = "predictions.db"):
         self.db_path = db_path
+        self._local = threading.local()
+        
+        # Memory front cache and the access_count bumps not written yet
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._pending_hits = Counter()
+        self._pending_hit_total = 0
+        self._last_hit_flush = time.monotonic()
+        atexit.register(self.flush_hits)
+        
+        # Write-behind queue for session updates and prediction logs. The writer
+        # thread is started lazily so that forked processes each start their own.
+        self._write_q = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.dropped_writes = 0
+        atexit.register(self._drain_writes)
+        
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database with tuned PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, cached_statements=CACHED_STATEMENTS)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _conn(self) -> sqlite3.Connection:
+        """
+        Return this thread's connection, opening it on first use.
+        Connections are reused across calls so SQLite keeps its page and
+        statement caches warm; a forked child opens its own.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
     def init_database(self):
         """Initialize the database with required tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Create predictions table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS predictions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        feature_hash TEXT UNIQUE NOT NULL,
-                        features TEXT NOT NULL,
-                        prediction INTEGER NOT NULL,
-                        prediction_text TEXT NOT NULL,
-                        confidence_score REAL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        access_count INTEGER DEFAULT 1,
-                        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create user_sessions table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_sessions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT UNIQUE NOT NULL,
-                        user_agent TEXT,
-                        ip_address TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        prediction_count INTEGER DEFAULT 0
-                    )
-                ''')
-                
-                # Create prediction_logs table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS prediction_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        session_id TEXT,
-                        feature_hash TEXT,
-                        prediction INTEGER,
-                        response_time_ms REAL,
-                        success BOOLEAN,
-                        error_message TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create indexes for better performance
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_feature_hash ON predictions(feature_hash)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON predictions(created_at)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_id ON user_sessions(session_id)')
-                
-                conn.commit()
-                logger.info("Database initialized successfully")
-                
+            # Warm start: the schema is already in place
+            version = self._conn().execute('PRAGMA user_version').fetchone()[0]
+            if version == CURRENT_SCHEMA_VERSION:
+                return
+            
+            # WAL is persistent and must be enabled outside a transaction
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.close()
+            
+            # The script runs in its own transaction, including the version bump
+            self._conn().executescript(SCHEMA_SQL)
+            logger.info("Database initialized successfully")
+            
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
     def get_feature_hash(self, features: List) -> str:
-        """Generate a hash for the feature array."""
-        feature_str = json.dumps(features, sort_keys=True)
-        return hashlib.md5(feature_str.encode()).hexdigest()
+        """Generate a 64-bit BLAKE2b hash (16 hex chars) of the packed feature array."""
+        return _hash_packed(pack_features(features))
     
     def cache_prediction(self, features: List, prediction: int, 
                         prediction_text: str, confidence_score: float = None) -> bool:
         """Cache a prediction result."""
         try:
-            feature_hash = self.get_feature_hash(features)
+            # Pack once: the same bytes are hashed and stored
+            packed = pack_features(features)
+            feature_hash = _hash_packed(packed)
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Check if prediction already exists
-                cursor.execute('''
-                    SELECT id, access_count FROM predictions 
-                    WHERE feature_hash = ?
-                ''', (feature_hash,))
-                
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # Update existing prediction
-                    cursor.execute('''
-                        UPDATE predictions 
-                        SET access_count = access_count + 1,
-                            last_accessed = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (existing[0],))
-                else:
-                    # Insert new prediction
-                    cursor.execute('''
-                        INSERT INTO predictions 
-                        (feature_hash, features, prediction, prediction_text, confidence_score)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (feature_hash, json.dumps(features), prediction, 
-                          prediction_text, confidence_score))
+            with self._conn() as conn:
+                # Insert a new prediction, or count another hit on an existing one
+                conn.execute(SQL_UPSERT_PRED, (feature_hash, packed, prediction,
+                                               prediction_text, confidence_score))
                 
                 conn.commit()
                 logger.info(f"Prediction cached successfully for hash: {feature_hash}")
@@ -128,57 +294,93 @@ class PredictionCache:
     def get_cached_prediction(self, features: List) -> Optional[Dict]:
         """Retrieve a cached prediction if it exists."""
         try:
-            feature_hash = self.get_feature_hash(features)
+            # Serve repeated lookups from memory, keyed by the feature tuple so a
+            # hit needs no hashing
+            key = tuple(features)
+            with self._memory_lock:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    feature_hash, cached = entry
+                    self._memory.move_to_end(key)
+                    cached['access_count'] += 1
+                    cached = dict(cached)
+            
+            if entry is None:
+                feature_hash = self.get_feature_hash(features)
+                
+                # A plain SELECT opens no transaction, so a read never commits
+                result = self._conn().execute(SQL_SELECT_PRED, (feature_hash,)).fetchone()
+                if not result:
+                    return None
+                
+                cached = {
+                    'prediction': result[0],
+                    'prediction_text': result[1],
+                    'confidence_score': result[2],
+                    'cached_at': result[3],
+                    'access_count': result[4],
+                    'from_cache': True
+                }
+                self._remember(key, feature_hash, cached)
+                cached = dict(cached)
+            
+            self._record_hit(feature_hash)
+            return cached
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT prediction, prediction_text, confidence_score, 
-                           created_at, access_count
-                    FROM predictions 
-                    WHERE feature_hash = ?
-                ''', (feature_hash,))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    # Update access count and timestamp
-                    cursor.execute('''
-                        UPDATE predictions 
-                        SET access_count = access_count + 1,
-                            last_accessed = CURRENT_TIMESTAMP
-                        WHERE feature_hash = ?
-                    ''', (feature_hash,))
-                    conn.commit()
-                    
-                    return {
-                        'prediction': result[0],
-                        'prediction_text': result[1],
-                        'confidence_score': result[2],
-                        'cached_at': result[3],
-                        'access_count': result[4],
-                        'from_cache': True
-                    }
-                
-                return None
-                
         except Exception as e:
             logger.error(f"Failed to retrieve cached prediction: {e}")
             return None
     
+    def _remember(self, key: Tuple, feature_hash: str, cached: Dict):
+        """Add a prediction to the memory front cache, evicting the oldest entry."""
+        with self._memory_lock:
+            self._memory[key] = (feature_hash, cached)
+            self._memory.move_to_end(key)
+            if len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+    
+    def _record_hit(self, feature_hash: str):
+        """Count a cache hit; bumps are queued for the writer thread in batches."""
+        with self._memory_lock:
+            self._pending_hits[feature_hash] += 1
+            self._pending_hit_total += 1
+            due = (self._pending_hit_total >= HIT_FLUSH_THRESHOLD or
+                   time.monotonic() - self._last_hit_flush >= HIT_FLUSH_INTERVAL)
+        
+        # The lookup path never writes to SQLite itself
+        if due:
+            for hit in self._take_pending_hits():
+                self._enqueue_write(SQL_ADD_HITS, hit)
+    
+    def _take_pending_hits(self) -> List[Tuple[int, str]]:
+        """Remove and return the deferred bumps as (count, feature_hash) rows."""
+        with self._memory_lock:
+            self._last_hit_flush = time.monotonic()
+            hits = [(count, feature_hash) for feature_hash, count in self._pending_hits.items()]
+            self._pending_hits.clear()
+            self._pending_hit_total = 0
+        return hits
+    
+    def flush_hits(self):
+        """Write deferred access_count bumps to SQLite now (before stats, cleanup and at exit)."""
+        hits = self._take_pending_hits()
+        if not hits:
+            return
+        
+        try:
+            with self._conn() as conn:
+                conn.executemany(SQL_ADD_HITS, hits)
+        except Exception as e:
+            logger.error(f"Failed to flush cache hits: {e}")
+    
     def create_user_session(self, session_id: str, user_agent: str = None, 
                            ip_address: str = None) -> bool:
         """Create a new user session."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conn() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO user_sessions 
-                    (session_id, user_agent, ip_address, last_activity)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (session_id, user_agent, ip_address))
+                cursor.execute(SQL_INSERT_SESSION, (session_id, user_agent, ip_address))
                 
                 conn.commit()
                 logger.info(f"User session created: {session_id}")
@@ -190,76 +392,153 @@ class PredictionCache:
     
     def update_session_activity(self, session_id: str) -> bool:
         """Update session activity timestamp and prediction count."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    UPDATE user_sessions 
-                    SET last_activity = CURRENT_TIMESTAMP,
-                        prediction_count = prediction_count + 1
-                    WHERE session_id = ?
-                ''', (session_id,))
-                
-                conn.commit()
-                return True
-                
-        except Exception as e:
-            logger.error(f"Failed to update session activity: {e}")
-            return False
+        return self._enqueue_write(SQL_UPDATE_SESSION, (session_id,))
     
     def log_prediction(self, session_id: str, feature_hash: str, prediction: int,
                       response_time_ms: float, success: bool, error_message: str = None):
         """Log a prediction request for analytics."""
+        self._enqueue_write(SQL_INSERT_LOG, (session_id, feature_hash, prediction,
+                                             response_time_ms, success, error_message))
+        
+    def _enqueue_write(self, sql: str, params: tuple) -> bool:
+        """Queue a write for the writer thread; drop it rather than block if the queue is full."""
+        self._ensure_writer()
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO prediction_logs 
-                    (session_id, feature_hash, prediction, response_time_ms, 
-                     success, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (session_id, feature_hash, prediction, response_time_ms, 
-                      success, error_message))
-                
+            self._write_q.put_nowait((sql, params))
+            return True
+        except queue.Full:
+            with self._writer_lock:
+                self.dropped_writes += 1
+            return False
+    
+    def _ensure_writer(self):
+        """Start the background writer thread if it is not running."""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer.start()
+    
+    def _writer_loop(self):
+        """Background loop draining the write queue in batches until it reads _WRITER_STOP."""
+        while True:
+            batch = []
+            item = self._write_q.get()
+            deadline = time.monotonic() + WRITE_BATCH_TIMEOUT
+            
+            while item is not _WRITER_STOP:
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= WRITE_BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    item = self._write_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write_batch(batch)
+            if item is _WRITER_STOP:
+                return
+    
+    def _drain_writes(self):
+        """Stop the writer thread, then write whatever is still queued (called at exit)."""
+        # The writer finishes the batch it has already taken off the queue
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._write_q.put(_WRITER_STOP)
+            writer.join()
+        
+        batch = []
+        while True:
+            try:
+                batch.append(self._write_q.get_nowait())
+            except queue.Empty:
+                break
+        
+        if batch:
+            self._write_batch(batch)
+    
+    def _write_batch(self, batch: List[Tuple[str, tuple]]):
+        """
+        Apply queued writes with one executemany per statement in a single transaction.
+        A failed batch (e.g. SQLITE_BUSY past the busy timeout) is retried once and
+        then counted in dropped_writes.
+        """
+        groups = {}
+        for sql, params in batch:
+            groups.setdefault(sql, []).append(params)
+        
+        conn = self._conn()
+        for attempt in range(2):
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                for sql, rows in groups.items():
+                    conn.executemany(sql, rows)
                 conn.commit()
-                
+                return
+            except Exception as e:
+                conn.rollback()
+                error = e
+        
+        with self._writer_lock:
+            self.dropped_writes += len(batch)
+        logger.error(f"Dropped {len(batch)} queued rows after a retry: {error}")
+    
+    def create_task(self, task_id: str, features: List, ttl: int) -> bool:
+        """Record a pending asynchronous prediction, removing tasks older than ttl seconds."""
+        try:
+            with self._conn() as conn:
+                conn.execute(SQL_DELETE_EXPIRED_TASKS, (f'-{int(ttl)} seconds',))
+                conn.execute(SQL_INSERT_TASK, (task_id, json.dumps(features)))
+            return True
+            
         except Exception as e:
-            logger.error(f"Failed to log prediction: {e}")
+            logger.error(f"Failed to create async task: {e}")
+            return False
+    
+    def finish_task(self, task_id: str, prediction: int = None, error_message: str = None) -> bool:
+        """Store the outcome of an asynchronous prediction; an error message marks it failed."""
+        status = 'failed' if error_message is not None else 'completed'
+        try:
+            with self._conn() as conn:
+                conn.execute(SQL_FINISH_TASK, (status, prediction, error_message, task_id))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to finish async task: {e}")
+            return False
+    
+    def get_task(self, task_id: str, ttl: int) -> Optional[Dict]:
+        """Return an asynchronous prediction task created within ttl seconds, or None."""
+        row = self._conn().execute(SQL_SELECT_TASK, (task_id, f'-{int(ttl)} seconds')).fetchone()
+        if not row:
+            return None
+        
+        return {
+            'features': json.loads(row[0]),
+            'status': row[1],
+            'prediction': row[2],
+            'error_message': row[3]
+        }
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Total predictions
-                cursor.execute('SELECT COUNT(*) FROM predictions')
-                total_predictions = cursor.fetchone()[0]
-                
-                # Cache hit rate (approximate)
-                cursor.execute('SELECT SUM(access_count) FROM predictions')
-                total_accesses = cursor.fetchone()[0] or 0
-                
-                # Recent predictions (last 24 hours)
-                cursor.execute('''
-                    SELECT COUNT(*) FROM predictions 
-                    WHERE created_at > datetime('now', '-1 day')
-                ''')
-                recent_predictions = cursor.fetchone()[0]
-                
-                # Average confidence score
-                cursor.execute('''
-                    SELECT AVG(confidence_score) FROM predictions 
-                    WHERE confidence_score IS NOT NULL
-                ''')
-                avg_confidence = cursor.fetchone()[0] or 0
+            self.flush_hits()
+            
+            with self._conn() as conn:
+                # Totals, accesses (approximate hit rate), last 24 hours and
+                # average confidence in a single pass; AVG skips NULL scores
+                total_predictions, total_accesses, recent_predictions, avg_confidence = \
+                    conn.execute(SQL_CACHE_STATS).fetchone()
+                avg_confidence = avg_confidence or 0
                 
                 return {
                     'total_predictions': total_predictions,
                     'total_accesses': total_accesses,
-                    'recent_predictions_24h': recent_predictions,
+                    'recent_predictions_24h': recent_predictions or 0,
                     'average_confidence': round(avg_confidence, 2),
                     'cache_size_mb': self._get_database_size()
                 }
@@ -271,20 +550,27 @@ class PredictionCache:
     def cleanup_old_predictions(self, days: int = 30) -> int:
         """Remove predictions older than specified days."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    DELETE FROM predictions 
-                    WHERE created_at < datetime('now', '-{} days')
-                '''.format(days))
-                
-                deleted_count = cursor.rowcount
-                conn.commit()
-                
-                logger.info(f"Cleaned up {deleted_count} old predictions")
-                return deleted_count
-                
+            self.flush_hits()
+            with self._memory_lock:
+                self._memory.clear()
+            
+            conn = self._conn()
+            cutoff = f'-{int(days)} days'
+            deleted_count = 0
+            
+            while True:
+                with conn:
+                    deleted = conn.execute(SQL_DELETE_OLD_PREDS, (cutoff, CLEANUP_CHUNK_SIZE)).rowcount
+                deleted_count += deleted
+                if deleted < CLEANUP_CHUNK_SIZE:
+                    break
+            
+            # Return the space freed in the WAL to the OS
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            
+            logger.info(f"Cleaned up {deleted_count} old predictions")
+            return deleted_count
+            
         except Exception as e:
             logger.error(f"Failed to cleanup old predictions: {e}")
             return 0
@@ -292,11 +578,21 @@ class PredictionCache:
     def _get_database_size(self) -> float:
         """Get database file size in MB."""
         try:
-            import os
             size_bytes = os.path.getsize(self.db_path)
             return round(size_bytes / (1024 * 1024), 2)
         except:
             return 0.0
 
 # Global cache instance
-prediction_cache = PredictionCache() 
\ No newline at end of file
+# Created on first use so importing this module does no I/O
+_cache_singleton = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> PredictionCache:
+    """Return the process-wide prediction cache, creating it on first use."""
+    global _cache_singleton
+    if _cache_singleton is None:
+        with _cache_lock:
+            if _cache_singleton is None:
+                _cache_singleton = PredictionCache()
+    return _cache_singleton
@@ -4,21 +4,42 @@ Deployment script for Mobile Price Predictor application.
 """
 
 import os
+import hashlib
 import subprocess
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a shell command and handle errors."""
+# Number of trailing output lines run_command keeps and returns
+OUTPUT_TAIL_LINES = 1000
+
+# Hash of the interpreter and requirements.txt that were last installed successfully
+REQUIREMENTS_SENTINEL = Path(".deploy-cache/requirements.sha")
+
+def run_command(command: list, description):
+    """Run a command (argv list, no shell), streaming its output, and handle errors."""
     print(f"🔄 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(f"✅ {description} completed successfully")
-        return result.stdout
-    except subprocess.CalledProcessError as e:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1)
+    except OSError as e:
         print(f"❌ {description} failed: {e}")
-        print(f"Error output: {e.stderr}")
         return None
+    
+    # Show progress as it happens and keep only the tail in memory
+    output = deque(maxlen=OUTPUT_TAIL_LINES)
+    with process:
+        for line in process.stdout:
+            print(line, end='')
+            output.append(line)
+    
+    if process.returncode != 0:
+        print(f"❌ {description} failed with exit code {process.returncode}")
+        return None
+    
+    print(f"✅ {description} completed successfully")
+    return ''.join(output)
 
 def check_dependencies():
     """Check if required dependencies are installed."""
@@ -50,8 +71,27 @@ def install_dependencies():
         print("❌ requirements.txt not found")
         return False
     
-    result = run_command("pip install -r requirements.txt", "Installing Python packages")
-    return result is not None
+    with open("requirements.txt", "rb") as f:
+        requirements = f.read()
+    
+    # The sentinel is per interpreter: a new venv in the same checkout still installs
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(sys.executable.encode())
+    digest.update(requirements)
+    requirements_hash = digest.hexdigest()
+    
+    if REQUIREMENTS_SENTINEL.exists() and REQUIREMENTS_SENTINEL.read_text().strip() == requirements_hash:
+        print("✅ Dependencies unchanged, skipping install")
+        return True
+    
+    command = [sys.executable, "-m", "pip", "install", "-r", "requirements.txt"]
+    result = run_command(command, "Installing Python packages")
+    if result is None:
+        return False
+    
+    REQUIREMENTS_SENTINEL.parent.mkdir(exist_ok=True)
+    REQUIREMENTS_SENTINEL.write_text(requirements_hash)
+    return True
 
 def setup_environment():
     """Set up environment variables."""
@@ -79,7 +119,7 @@ def run_tests():
     print("🧪 Running tests...")
     
     if os.path.exists("test_app.py"):
-        result = run_command("python -m pytest test_app.py -v", "Running test suite")
+        result = run_command([sys.executable, "-m", "pytest", "test_app.py", "-v"], "Running test suite")
         return result is not None
     else:
         print("⚠️  No test files found, skipping tests")
@@ -92,7 +132,7 @@ def start_application():
     print("⏹️  Press Ctrl+C to stop the application")
     
     try:
-        subprocess.run([sys.executable, "app.py"], check=True)
+        subprocess.run([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"], check=True)
     except KeyboardInterrupt:
         print("\n🛑 Application stopped by user")
     except subprocess.CalledProcessError as e:
@@ -108,14 +148,17 @@ def main():
         print("❌ Dependency check failed. Please install required dependencies.")
         sys.exit(1)
     
-    # Install dependencies
-    if not install_dependencies():
+    # Install dependencies and set up the environment in parallel; the
+    # environment setup is local file I/O and does not depend on pip
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        installed = executor.submit(install_dependencies)
+        environment = executor.submit(setup_environment)
+        environment.result()
+    
+    if not installed.result():
         print("❌ Failed to install dependencies.")
         sys.exit(1)
     
-    # Setup environment
-    setup_environment()
-    
     # Run tests
     if not run_tests():
         print("❌ Tests failed. Please fix issues before deployment.")
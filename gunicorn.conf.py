@@ -0,0 +1,20 @@
+"""
+Gunicorn configuration for serving the Mobile Price Predictor in production.
+"""
+
+import os
+
+# Server socket
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:80')
+
+# Worker processes: gevent workers let blocking SageMaker calls yield,
+# so each worker can keep many predictions in flight at once.
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'INFO').lower()
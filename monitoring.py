@@ -5,12 +5,15 @@ Monitoring module for application metrics and health checks.
 import time
 import psutil
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
 from dataclasses import dataclass
-from collections import deque
 import threading
-import json
+import itertools
+import orjson
+from config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +26,7 @@ class SystemMetrics:
     memory_total_mb: float
     disk_usage_percent: float
     network_io: Dict[str, float]
-    timestamp: datetime
+    timestamp: float  # POSIX seconds
 
 @dataclass
 class ApplicationMetrics:
@@ -34,27 +37,224 @@ class ApplicationMetrics:
     average_response_time: float
     cache_hit_rate: float
     active_connections: int
-    timestamp: datetime
+    timestamp: float  # POSIX seconds
+
+# Column layouts (name -> array typecode) of the metric ring buffers;
+# timestamps are POSIX seconds
+SYSTEM_COLUMNS = {
+    'timestamp': 'd',
+    'cpu_percent': 'd',
+    'memory_percent': 'd',
+    'memory_used_mb': 'd',
+    'memory_total_mb': 'd',
+    'disk_usage_percent': 'd',
+    'bytes_sent': 'Q',
+    'bytes_recv': 'Q',
+    'packets_sent': 'Q',
+    'packets_recv': 'Q',
+}
+
+APPLICATION_COLUMNS = {
+    'timestamp': 'd',
+    'total_requests': 'q',
+    'successful_requests': 'q',
+    'failed_requests': 'q',
+    'average_response_time': 'd',
+    'cache_hit_rate': 'd',
+    'active_connections': 'q',
+}
+
+NETWORK_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv')
+
+# Columns reported by get_metrics_history
+HISTORY_SYSTEM_COLUMNS = ['timestamp', 'cpu_percent', 'memory_percent', 'disk_usage_percent']
+HISTORY_APPLICATION_COLUMNS = ['timestamp', 'total_requests', 'successful_requests',
+                               'failed_requests', 'average_response_time']
+
+# Trend labels -> ring columns, and the slope (change per sample over the
+# last hour) beyond which a column counts as increasing/decreasing
+SYSTEM_TREND_FIELDS = {'cpu': 'cpu_percent', 'memory': 'memory_percent', 'disk': 'disk_usage_percent'}
+APP_TREND_FIELDS = {'requests': 'total_requests', 'errors': 'failed_requests'}
+SYSTEM_TREND_THRESHOLD = 1.0
+APP_TREND_THRESHOLD = 0.1
+
+# Decay factors of the slow (reported) and fast response-time EWMAs; the
+# trend is 'increasing'/'decreasing' once they differ by more than the deadzone
+RESPONSE_TIME_DECAY = 0.995
+RESPONSE_TIME_FAST_DECAY = 0.9
+RESPONSE_TIME_TREND_DEADZONE = 0.1
+
+class MetricRing:
+    """
+    Fixed-capacity ring buffer storing records column-wise in typed arrays.
+    
+    Records are appended in time order, so the chronological timestamp
+    column is sorted and can be searched with bisect. A lock keeps readers
+    from seeing a record half written or columns rotated differently.
+    """
+    
+    def __init__(self, capacity: int, columns: Dict[str, str]):
+        self.capacity = capacity
+        # Allocated once at full size; appends only ever overwrite slots
+        self.columns = {name: array(typecode, [0]) * capacity for name, typecode in columns.items()}
+        self.idx = 0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, record: Dict):
+        """Write a record, overwriting the oldest one once the ring is full."""
+        with self._lock:
+            for name, column in self.columns.items():
+                column[self.idx] = record[name]
+            self.idx = (self.idx + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+    
+    def last(self) -> Optional[Dict]:
+        """Return the newest record, or None if the ring is empty."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            i = (self.idx - 1) % self.capacity
+            return {name: column[i] for name, column in self.columns.items()}
+    
+    def _start_after(self, timestamp: float) -> int:
+        """Chronological position of the first record newer than timestamp (caller holds _lock)."""
+        timestamps = self.columns['timestamp']
+        if self.count < self.capacity:
+            return bisect_right(timestamps, timestamp, 0, self.count)
+        
+        # A full ring holds two sorted runs: [idx:] (older) then [:idx]
+        pos = bisect_right(timestamps, timestamp, self.idx, self.capacity)
+        if pos < self.capacity:
+            return pos - self.idx
+        return self.capacity - self.idx + bisect_right(timestamps, timestamp, 0, self.idx)
+    
+    def _ordered(self, name: str, start: int = 0) -> array:
+        """Copy one column in chronological order from position start (caller holds _lock)."""
+        column = self.columns[name]
+        if self.count < self.capacity:
+            return column[start:self.count]
+        first = self.idx + start
+        if first < self.capacity:
+            return column[first:] + column[:self.idx]
+        return column[first - self.capacity:self.idx]
+    
+    def column(self, name: str) -> array:
+        """Return one column in chronological order (oldest first)."""
+        with self._lock:
+            return self._ordered(name)
+    
+    def select(self, names: List[str], after: float = None) -> List[array]:
+        """
+        Copy several columns in chronological order from one consistent view,
+        keeping only records newer than the after timestamp if given.
+        """
+        with self._lock:
+            start = self._start_after(after) if after is not None else 0
+            return [self._ordered(name, start) for name in names]
+    
+    def records(self, after: float = None, names: List[str] = None):
+        """Yield records (optionally only some columns) in chronological order, newer than after if given."""
+        names = names or list(self.columns)
+        for values in zip(*self.select(names, after)):
+            yield dict(zip(names, values))
+
+def _to_system_metrics(record: Dict) -> SystemMetrics:
+    """Build a SystemMetrics from a system ring record."""
+    return SystemMetrics(
+        cpu_percent=record['cpu_percent'],
+        memory_percent=record['memory_percent'],
+        memory_used_mb=record['memory_used_mb'],
+        memory_total_mb=record['memory_total_mb'],
+        disk_usage_percent=record['disk_usage_percent'],
+        network_io={field: record[field] for field in NETWORK_FIELDS},
+        timestamp=record['timestamp']
+    )
+
+def _to_application_metrics(record: Dict) -> ApplicationMetrics:
+    """Build an ApplicationMetrics from an application ring record."""
+    return ApplicationMetrics(
+        total_requests=record['total_requests'],
+        successful_requests=record['successful_requests'],
+        failed_requests=record['failed_requests'],
+        average_response_time=record['average_response_time'],
+        cache_hit_rate=record['cache_hit_rate'],
+        active_connections=record['active_connections'],
+        timestamp=record['timestamp']
+    )
+
+def _slope_label(values, threshold: float) -> str:
+    """Label a series 'increasing', 'decreasing' or 'stable' by its average slope."""
+    if len(values) < 2:
+        return 'stable'
+    slope = (values[-1] - values[0]) / len(values)
+    if slope > threshold:
+        return 'increasing'
+    elif slope < -threshold:
+        return 'decreasing'
+    else:
+        return 'stable'
+
+def _format_error(entry: Dict) -> Dict:
+    """Copy an error entry with its timestamp rendered as ISO 8601."""
+    return {**entry, 'timestamp': datetime.fromtimestamp(entry['timestamp']).isoformat()}
 
 class MetricsCollector:
     """Collects and stores application and system metrics."""
     
     def __init__(self, max_history: int = 1000):
         self.max_history = max_history
-        self.system_metrics = deque(maxlen=max_history)
-        self.application_metrics = deque(maxlen=max_history)
-        self.request_times = deque(maxlen=max_history)
-        self.error_log = deque(maxlen=max_history)
+        self.system_metrics = MetricRing(max_history, SYSTEM_COLUMNS)
+        self.application_metrics = MetricRing(max_history, APPLICATION_COLUMNS)
+        
+        # Error ring: writers claim a slot from an itertools.count (its next()
+        # is a single C call, so concurrent writers never share a slot) and
+        # store (sequence, entry); readers order a copy by sequence. No lock.
+        self._error_slots = [None] * max_history
+        self._error_seq = itertools.count()
+        
+        # Live request counters and the response-time averages below; all guarded
+        # by _request_lock so they never drift relative to each other
+        self._request_lock = threading.Lock()
+        self._total_requests = 0
+        self._successful_requests = 0
+        self._failed_requests = 0
+        
+        # Exponentially weighted response-time averages (None until the first
+        # request); the fast one is only used to detect the trend
+        self._avg_rt = None
+        self._fast_rt = None
+        self._rt_samples = 0
+        
+        # Disk and network are probed less often than CPU/memory; the last
+        # readings are reused in between
+        self._last_disk_probe = None
+        self._last_net_probe = None
+        self._disk_usage_percent = 0.0
+        self._network_io = {}
+        
+        # Last get_current_metrics() result, shared by callers within the TTL
+        self._cached_snapshot = None
+        self._cached_at = 0.0
         
-        # Start background collection
+        # Start background collection; setting _stop_evt wakes the loop at once
         self.running = False
         self.collection_thread = None
+        self._stop_evt = threading.Event()
         self.start_collection()
     
     def start_collection(self):
         """Start background metrics collection."""
+        if not Config.METRICS_ENABLED:
+            logger.info("Metrics collection disabled")
+            return
         if not self.running:
             self.running = True
+            self._stop_evt.clear()
             self.collection_thread = threading.Thread(target=self._collect_metrics_loop, daemon=True)
             self.collection_thread.start()
             logger.info("Metrics collection started")
@@ -62,25 +262,32 @@ class MetricsCollector:
     def stop_collection(self):
         """Stop background metrics collection."""
         self.running = False
+        self._stop_evt.set()
         if self.collection_thread:
             self.collection_thread.join()
             logger.info("Metrics collection stopped")
     
     def _collect_metrics_loop(self):
         """Background loop for collecting metrics."""
+        # The first non-blocking cpu_percent() call only sets the baseline
+        psutil.cpu_percent(interval=None)
+        
         while self.running:
             try:
+                if self._stop_evt.wait(Config.METRICS_CPU_INTERVAL):
+                    break
                 self.collect_system_metrics()
-                time.sleep(30)  # Collect every 30 seconds
+                self.collect_application_metrics()
             except Exception as e:
                 logger.error(f"Error in metrics collection loop: {e}")
-                time.sleep(60)  # Wait longer on error
+                if self._stop_evt.wait(60):  # Wait longer on error
+                    break
     
     def collect_system_metrics(self):
         """Collect current system metrics."""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU usage since the previous call; does not block the thread
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Memory usage
             memory = psutil.virtual_memory()
@@ -88,28 +295,35 @@ class MetricsCollector:
             memory_used_mb = memory.used / (1024 * 1024)
             memory_total_mb = memory.total / (1024 * 1024)
             
+            now = time.monotonic()
+            
             # Disk usage
-            disk = psutil.disk_usage('/')
-            disk_usage_percent = disk.percent
+            if self._last_disk_probe is None or now - self._last_disk_probe >= Config.METRICS_DISK_INTERVAL:
+                self._disk_usage_percent = psutil.disk_usage('/').percent
+                self._last_disk_probe = now
+            disk_usage_percent = self._disk_usage_percent
             
             # Network I/O
-            network = psutil.net_io_counters()
-            network_io = {
-                'bytes_sent': network.bytes_sent,
-                'bytes_recv': network.bytes_recv,
-                'packets_sent': network.packets_sent,
-                'packets_recv': network.packets_recv
-            }
+            if self._last_net_probe is None or now - self._last_net_probe >= Config.METRICS_NET_INTERVAL:
+                network = psutil.net_io_counters()
+                self._network_io = {
+                    'bytes_sent': network.bytes_sent,
+                    'bytes_recv': network.bytes_recv,
+                    'packets_sent': network.packets_sent,
+                    'packets_recv': network.packets_recv
+                }
+                self._last_net_probe = now
+            network_io = self._network_io
             
-            metrics = SystemMetrics(
-                cpu_percent=cpu_percent,
-                memory_percent=memory_percent,
-                memory_used_mb=memory_used_mb,
-                memory_total_mb=memory_total_mb,
-                disk_usage_percent=disk_usage_percent,
-                network_io=network_io,
-                timestamp=datetime.now()
-            )
+            metrics = {
+                'timestamp': time.time(),
+                'cpu_percent': cpu_percent,
+                'memory_percent': memory_percent,
+                'memory_used_mb': memory_used_mb,
+                'memory_total_mb': memory_total_mb,
+                'disk_usage_percent': disk_usage_percent,
+            }
+            metrics.update(network_io)
             
             self.system_metrics.append(metrics)
             
@@ -118,36 +332,75 @@ class MetricsCollector:
     
     def record_request(self, response_time: float, success: bool):
         """Record a request metric."""
-        self.request_times.append(response_time)
-        
-        # Update application metrics
-        if len(self.application_metrics) > 0:
-            last_metrics = self.application_metrics[-1]
-            total_requests = last_metrics.total_requests + 1
-            successful_requests = last_metrics.successful_requests + (1 if success else 0)
-            failed_requests = last_metrics.failed_requests + (0 if success else 1)
-        else:
-            total_requests = 1
-            successful_requests = 1 if success else 0
-            failed_requests = 0 if success else 1
+        with self._request_lock:
+            self._record_response_time(response_time)
+            
+            self._total_requests += 1
+            if success:
+                self._successful_requests += 1
+            else:
+                self._failed_requests += 1
+    
+    def record_request_batch(self, response_times: Sequence[float], successes: Sequence[bool]):
+        """Record many request metrics at once (same order as repeated record_request calls)."""
+        if len(response_times) != len(successes):
+            raise ValueError("response_times and successes must have the same length")
         
-        # Calculate average response time
-        if self.request_times:
-            avg_response_time = sum(self.request_times) / len(self.request_times)
-        else:
-            avg_response_time = 0.0
+        succeeded = sum(1 for success in successes if success)
+        with self._request_lock:
+            for response_time in response_times:
+                self._record_response_time(response_time)
+            
+            self._total_requests += len(response_times)
+            self._successful_requests += succeeded
+            self._failed_requests += len(response_times) - succeeded
+    
+    def collect_application_metrics(self):
+        """Append a snapshot of the live request counters to the application history."""
+        self.application_metrics.append(self._application_record())
+    
+    def _application_record(self) -> Dict:
+        """Snapshot the live counters into an application ring record."""
+        with self._request_lock:
+            return {
+                'timestamp': time.time(),
+                'total_requests': self._total_requests,
+                'successful_requests': self._successful_requests,
+                'failed_requests': self._failed_requests,
+                'average_response_time': self._avg_rt or 0.0,
+                'cache_hit_rate': 0.0,  # Will be updated by cache module
+                'active_connections': 0,  # Will be updated by connection tracking
+            }
+    
+    def _record_response_time(self, response_time: float):
+        """Fold a response time into the running averages (caller holds _request_lock)."""
+        self._rt_samples += 1
+        if self._avg_rt is None:
+            self._avg_rt = self._fast_rt = response_time
+            return
         
-        metrics = ApplicationMetrics(
-            total_requests=total_requests,
-            successful_requests=successful_requests,
-            failed_requests=failed_requests,
-            average_response_time=avg_response_time,
-            cache_hit_rate=0.0,  # Will be updated by cache module
-            active_connections=0,  # Will be updated by connection tracking
-            timestamp=datetime.now()
-        )
+        # Plain cumulative mean until 1/(1 - decay) samples have been seen, so a
+        # slow cold-start request does not dominate the average
+        warmup = 1 - 1 / self._rt_samples
+        slow = min(RESPONSE_TIME_DECAY, warmup)
+        fast = min(RESPONSE_TIME_FAST_DECAY, warmup)
+        self._avg_rt = slow * self._avg_rt + (1 - slow) * response_time
+        self._fast_rt = fast * self._fast_rt + (1 - fast) * response_time
+    
+    def _response_time_trend(self) -> str:
+        """Compare the fast and slow response-time averages to label the trend."""
+        with self._request_lock:
+            slow, fast = self._avg_rt, self._fast_rt
         
-        self.application_metrics.append(metrics)
+        if not slow:
+            return 'stable'
+        change = (fast - slow) / slow
+        if change > RESPONSE_TIME_TREND_DEADZONE:
+            return 'increasing'
+        elif change < -RESPONSE_TIME_TREND_DEADZONE:
+            return 'decreasing'
+        else:
+            return 'stable'
     
     def record_error(self, error_type: str, error_message: str, stack_trace: str = None):
         """Record an error for monitoring."""
@@ -155,23 +408,50 @@ class MetricsCollector:
             'type': error_type,
             'message': error_message,
             'stack_trace': stack_trace,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': time.time()
         }
-        self.error_log.append(error_entry)
+        seq = next(self._error_seq)
+        self._error_slots[seq % self.max_history] = (seq, error_entry)
         logger.error(f"Error recorded: {error_type} - {error_message}")
     
+    def _error_log(self) -> List[Dict]:
+        """Return the recorded errors still in the ring, oldest first."""
+        slots = [slot for slot in list(self._error_slots) if slot is not None]
+        slots.sort(key=lambda slot: slot[0])
+        return [entry for _, entry in slots]
+    
     def get_current_metrics(self) -> Dict:
-        """Get current metrics summary."""
+        """Get current metrics summary, reusing a snapshot for METRICS_SNAPSHOT_TTL seconds."""
+        now = time.monotonic()
+        if self._cached_snapshot and now - self._cached_at < Config.METRICS_SNAPSHOT_TTL:
+            return self._cached_snapshot
+        
+        snapshot = self._build_current_metrics()
+        if snapshot:
+            self._cached_snapshot = snapshot
+            self._cached_at = now
+        return snapshot
+    
+    def _build_current_metrics(self) -> Dict:
+        """Build the current metrics summary."""
         try:
             # Get latest system metrics
-            system_metrics = self.system_metrics[-1] if self.system_metrics else None
+            system_record = self.system_metrics.last()
+            system_metrics = _to_system_metrics(system_record) if system_record else None
             
-            # Get latest application metrics
-            app_metrics = self.application_metrics[-1] if self.application_metrics else None
+            # Current application metrics come straight from the live counters
+            app_metrics = _to_application_metrics(self._application_record())
             
             # Calculate trends
-            system_trend = self._calculate_system_trend()
-            app_trend = self._calculate_app_trend()
+            system_trend = self._trend(self.system_metrics, SYSTEM_TREND_FIELDS, SYSTEM_TREND_THRESHOLD)
+            counter_trend = self._trend(self.application_metrics, APP_TREND_FIELDS, APP_TREND_THRESHOLD)
+            app_trend = {
+                'requests': counter_trend['requests'],
+                'response_time': self._response_time_trend(),
+                'errors': counter_trend['errors']
+            }
+            
+            error_log = self._error_log()
             
             return {
                 'system': {
@@ -195,8 +475,8 @@ class MetricsCollector:
                     'trend': app_trend
                 },
                 'errors': {
-                    'total_errors': len(self.error_log),
-                    'recent_errors': list(self.error_log)[-10:]  # Last 10 errors
+                    'total_errors': len(error_log),
+                    'recent_errors': [_format_error(e) for e in error_log[-10:]]  # Last 10 errors
                 },
                 'timestamp': datetime.now().isoformat()
             }
@@ -205,108 +485,42 @@ class MetricsCollector:
             logger.error(f"Failed to get current metrics: {e}")
             return {}
     
-    def _calculate_system_trend(self) -> Dict:
-        """Calculate system metrics trend over the last hour."""
+    def _trend(self, ring: MetricRing, fields: Dict[str, str], threshold: float) -> Dict:
+        """Label the trend of each ring column in fields (label -> column) over the last hour."""
         try:
-            one_hour_ago = datetime.now() - timedelta(hours=1)
-            recent_metrics = [
-                m for m in self.system_metrics 
-                if m.timestamp > one_hour_ago
-            ]
-            
-            if len(recent_metrics) < 2:
-                return {'cpu': 'stable', 'memory': 'stable', 'disk': 'stable'}
-            
-            # Calculate trends
-            cpu_values = [m.cpu_percent for m in recent_metrics]
-            memory_values = [m.memory_percent for m in recent_metrics]
-            disk_values = [m.disk_usage_percent for m in recent_metrics]
-            
-            def get_trend(values):
-                if len(values) < 2:
-                    return 'stable'
-                slope = (values[-1] - values[0]) / len(values)
-                if slope > 1:
-                    return 'increasing'
-                elif slope < -1:
-                    return 'decreasing'
-                else:
-                    return 'stable'
-            
-            return {
-                'cpu': get_trend(cpu_values),
-                'memory': get_trend(memory_values),
-                'disk': get_trend(disk_values)
-            }
+            columns = ring.select(list(fields.values()), after=time.time() - 3600)
+            return {label: _slope_label(values, threshold)
+                    for label, values in zip(fields, columns)}
             
         except Exception as e:
-            logger.error(f"Failed to calculate system trend: {e}")
-            return {'cpu': 'stable', 'memory': 'stable', 'disk': 'stable'}
-    
-    def _calculate_app_trend(self) -> Dict:
-        """Calculate application metrics trend over the last hour."""
-        try:
-            one_hour_ago = datetime.now() - timedelta(hours=1)
-            recent_metrics = [
-                m for m in self.application_metrics 
-                if m.timestamp > one_hour_ago
-            ]
-            
-            if len(recent_metrics) < 2:
-                return {'requests': 'stable', 'response_time': 'stable', 'errors': 'stable'}
-            
-            # Calculate trends
-            request_values = [m.total_requests for m in recent_metrics]
-            response_values = [m.average_response_time for m in recent_metrics]
-            error_values = [m.failed_requests for m in recent_metrics]
-            
-            def get_trend(values):
-                if len(values) < 2:
-                    return 'stable'
-                slope = (values[-1] - values[0]) / len(values)
-                if slope > 0.1:
-                    return 'increasing'
-                elif slope < -0.1:
-                    return 'decreasing'
-                else:
-                    return 'stable'
-            
-            return {
-                'requests': get_trend(request_values),
-                'response_time': get_trend(response_values),
-                'errors': get_trend(error_values)
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to calculate app trend: {e}")
-            return {'requests': 'stable', 'response_time': 'stable', 'errors': 'stable'}
+            logger.error(f"Failed to calculate trend: {e}")
+            return {label: 'stable' for label in fields}
     
     def get_metrics_history(self, hours: int = 24) -> Dict:
         """Get metrics history for the specified number of hours."""
         try:
-            cutoff_time = datetime.now() - timedelta(hours=hours)
+            cutoff_time = time.time() - hours * 3600
             
+            # Only the records inside the window are copied
             system_history = [
                 {
-                    'timestamp': m.timestamp.isoformat(),
-                    'cpu_percent': m.cpu_percent,
-                    'memory_percent': m.memory_percent,
-                    'disk_usage_percent': m.disk_usage_percent
+                    'timestamp': datetime.fromtimestamp(m['timestamp']).isoformat(),
+                    'cpu_percent': m['cpu_percent'],
+                    'memory_percent': m['memory_percent'],
+                    'disk_usage_percent': m['disk_usage_percent']
                 }
-                for m in self.system_metrics
-                if m.timestamp > cutoff_time
+                for m in self.system_metrics.records(cutoff_time, HISTORY_SYSTEM_COLUMNS)
             ]
             
             app_history = [
                 {
-                    'timestamp': m.timestamp.isoformat(),
-                    'total_requests': m.total_requests,
-                    'successful_requests': m.successful_requests,
-                    'failed_requests': m.failed_requests,
-                    'average_response_time': m.average_response_time
+                    'timestamp': datetime.fromtimestamp(m['timestamp']).isoformat(),
+                    'total_requests': m['total_requests'],
+                    'successful_requests': m['successful_requests'],
+                    'failed_requests': m['failed_requests'],
+                    'average_response_time': m['average_response_time']
                 }
-                for m in self.application_metrics
-                if m.timestamp > cutoff_time
+                for m in self.application_metrics.records(cutoff_time, HISTORY_APPLICATION_COLUMNS)
             ]
             
             return {
@@ -325,34 +539,34 @@ class MetricsCollector:
             metrics_data = {
                 'system_metrics': [
                     {
-                        'timestamp': m.timestamp.isoformat(),
-                        'cpu_percent': m.cpu_percent,
-                        'memory_percent': m.memory_percent,
-                        'memory_used_mb': m.memory_used_mb,
-                        'memory_total_mb': m.memory_total_mb,
-                        'disk_usage_percent': m.disk_usage_percent,
-                        'network_io': m.network_io
+                        'timestamp': datetime.fromtimestamp(m['timestamp']).isoformat(),
+                        'cpu_percent': m['cpu_percent'],
+                        'memory_percent': m['memory_percent'],
+                        'memory_used_mb': m['memory_used_mb'],
+                        'memory_total_mb': m['memory_total_mb'],
+                        'disk_usage_percent': m['disk_usage_percent'],
+                        'network_io': {field: m[field] for field in NETWORK_FIELDS}
                     }
-                    for m in self.system_metrics
+                    for m in self.system_metrics.records()
                 ],
                 'application_metrics': [
                     {
-                        'timestamp': m.timestamp.isoformat(),
-                        'total_requests': m.total_requests,
-                        'successful_requests': m.successful_requests,
-                        'failed_requests': m.failed_requests,
-                        'average_response_time': m.average_response_time,
-                        'cache_hit_rate': m.cache_hit_rate,
-                        'active_connections': m.active_connections
+                        'timestamp': datetime.fromtimestamp(m['timestamp']).isoformat(),
+                        'total_requests': m['total_requests'],
+                        'successful_requests': m['successful_requests'],
+                        'failed_requests': m['failed_requests'],
+                        'average_response_time': m['average_response_time'],
+                        'cache_hit_rate': m['cache_hit_rate'],
+                        'active_connections': m['active_connections']
                     }
-                    for m in self.application_metrics
+                    for m in self.application_metrics.records()
                 ],
-                'error_log': list(self.error_log),
+                'error_log': [_format_error(e) for e in self._error_log()],
                 'export_timestamp': datetime.now().isoformat()
             }
             
-            with open(filepath, 'w') as f:
-                json.dump(metrics_data, f, indent=2)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(metrics_data, option=orjson.OPT_INDENT_2))
             
             logger.info(f"Metrics exported to {filepath}")
             
@@ -360,4 +574,15 @@ class MetricsCollector:
             logger.error(f"Failed to export metrics: {e}")
 
 # Global metrics collector instance
-metrics_collector = MetricsCollector() 
\ No newline at end of file
+# Created on first use so importing this module starts no collection thread
+_collector_singleton = None
+_collector_lock = threading.Lock()
+
+def get_metrics_collector() -> MetricsCollector:
+    """Return the process-wide metrics collector, creating it on first use."""
+    global _collector_singleton
+    if _collector_singleton is None:
+        with _collector_lock:
+            if _collector_singleton is None:
+                _collector_singleton = MetricsCollector()
+    return _collector_singleton 
\ No newline at end of file
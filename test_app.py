@@ -4,9 +4,24 @@ Simple test suite for the Mobile Price Predictor application.
 
 import unittest
 from unittest.mock import patch, MagicMock
+import io
+import contextlib
+import os
 import json
+import sqlite3
+import tempfile
+import time
+import boto3
+import app as app_module
 from app import app
-from utils import validate_features, preprocess_features, format_prediction_result
+from utils import validate_features, preprocess_features, format_prediction_result, FEATURE_SCHEMA
+from batching import MicroBatcher
+import database
+from database import PredictionCache
+from config import Config
+from cli import summarize
+import deploy
+from monitoring import MetricRing, MetricsCollector, _slope_label
 
 class TestMobilePricePredictor(unittest.TestCase):
     """Test cases for the Mobile Price Predictor application."""
@@ -15,6 +30,29 @@ class TestMobilePricePredictor(unittest.TestCase):
         """Set up test client."""
         self.app = app.test_client()
         self.app.testing = True
+        app_module._prediction_cache.clear()
+        app_module._endpoint_status_cache.update(ts=0.0, status=None, error=None, refreshing=False)
+        
+        # Async tasks are kept in the SQLite cache; give each test its own
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'predictions.db')
+        database._cache_singleton = PredictionCache(self.db_path)
+    
+    def tearDown(self):
+        """Drop the temporary task database."""
+        database._cache_singleton._drain_writes()
+        database._cache_singleton = None
+        self.tmpdir.cleanup()
+    
+    def wait_for_task(self, task_id):
+        """Poll the result endpoint until the task is no longer pending."""
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            response = self.app.get(f'/api/result/{task_id}')
+            if response.get_json().get('status') != 'pending':
+                return response
+            time.sleep(0.01)
+        self.fail(f"Task {task_id} still pending")
     
     def test_home_page_get(self):
         """Test that home page loads correctly."""
@@ -48,6 +86,13 @@ class TestMobilePricePredictor(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertIn("non-negative", message)
     
+    def test_validate_features_out_of_range(self):
+        """Test feature validation with an out-of-range RAM value."""
+        features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 200000, 10, 5, 10, 1, 1, 1]
+        is_valid, message = validate_features(features)
+        self.assertFalse(is_valid)
+        self.assertEqual(message, "RAM must be between 0 and 100000")
+    
     def test_preprocess_features(self):
         """Test feature preprocessing."""
         features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
@@ -70,6 +115,383 @@ class TestMobilePricePredictor(unittest.TestCase):
         text, image = format_prediction_result(99)  # Invalid prediction
         self.assertEqual(text, "Unknown prediction result")
         self.assertEqual(image, "placeholder.svg")
+        
+        # Model output may be decoded as a float
+        text, image = format_prediction_result(2.0)
+        self.assertEqual(text, "Upper mid-range phone")
+        
+        # Negative values must not wrap around like a sequence index
+        text, image = format_prediction_result(-1)
+        self.assertEqual(text, "Unknown prediction result")
+    
+    @patch('app._sagemaker_runtime')
+    def test_home_page_post(self, mock_runtime):
+        """Test that the form is parsed in schema order and a prediction is shown."""
+        mock_runtime.invoke_endpoint.side_effect = lambda **kwargs: {'Body': io.BytesIO(b'[3]')}
+        features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+        form = {name: str(value) for (name, _), value in zip(FEATURE_SCHEMA, features)}
+        
+        response = self.app.post('/', data=form)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Premium phone', response.data)
+        payload = json.loads(mock_runtime.invoke_endpoint.call_args.kwargs['Body'])
+        self.assertEqual(payload, [features])
+    
+    @patch('app._sagemaker_runtime')
+    def test_api_predict_uses_cache(self, mock_runtime):
+        """Test that identical API predictions only invoke SageMaker once."""
+        mock_runtime.invoke_endpoint.side_effect = lambda **kwargs: {'Body': io.BytesIO(b'[2]')}
+        features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+        
+        for _ in range(2):
+            response = self.app.post('/api/predict', json={'features': features})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['prediction'], 2)
+        
+        # Equal values with different numeric types share the cache entry
+        float_features = [float(f) for f in features]
+        response = self.app.post('/api/predict', json={'features': float_features})
+        self.assertEqual(response.get_json()['prediction'], 2)
+        
+        self.assertEqual(mock_runtime.invoke_endpoint.call_count, 1)
+    
+    @patch('app._sagemaker_runtime')
+    def test_api_batch_predict(self, mock_runtime):
+        """Test batch predictions keep input order and report invalid rows."""
+        mock_runtime.invoke_endpoint.side_effect = lambda **kwargs: {
+            'Body': io.BytesIO(json.dumps([1] * len(json.loads(kwargs['Body']))).encode())
+        }
+        valid = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+        other = [1500, 0, 2.0, 0, 2, 1, 32, 0.5, 120, 8, 12, 800, 1200, 3000, 12, 6, 15, 1, 1, 0]
+        
+        response = self.app.post('/api/batch-predict', json={'features_list': [valid, [1, 2], other]})
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([r['index'] for r in data['results']], [0, 1, 2])
+        self.assertIn('error', data['results'][1])
+        self.assertEqual(data['results'][2]['prediction'], 1)
+        self.assertEqual(data['successful_predictions'], 2)
+        mock_runtime.invoke_endpoint.assert_called_once()
+    
+    @patch('app._sagemaker_runtime')
+    def test_api_predict_async(self, mock_runtime):
+        """Test that async predictions return a task id that resolves to a result."""
+        mock_runtime.invoke_endpoint.side_effect = lambda **kwargs: {'Body': io.BytesIO(b'[0]')}
+        features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+        
+        response = self.app.post('/api/predict/async', json={'features': features})
+        self.assertEqual(response.status_code, 202)
+        task_id = response.get_json()['task_id']
+        
+        response = self.wait_for_task(task_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'completed')
+        self.assertEqual(response.get_json()['prediction_text'], 'Budget mobile phone')
+        
+        self.assertEqual(self.app.get('/api/result/unknown').status_code, 404)
+    
+    @patch('app._sagemaker_runtime')
+    def test_api_result_from_another_worker(self, mock_runtime):
+        """Test that a task submitted by one worker can be read by another."""
+        mock_runtime.invoke_endpoint.side_effect = lambda **kwargs: {'Body': io.BytesIO(b'[3]')}
+        features = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+        
+        task_id = self.app.post('/api/predict/async', json={'features': features}).get_json()['task_id']
+        self.wait_for_task(task_id)
+        
+        # A second worker process has its own cache instance on the same database
+        database._cache_singleton = PredictionCache(self.db_path)
+        response = self.app.get(f'/api/result/{task_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['prediction_text'], 'Premium phone')
+    
+    def test_health_check_caches_endpoint_status(self):
+        """Test that repeated health probes reuse the cached endpoint status."""
+        mock_client = MagicMock(spec=boto3.client('sagemaker', region_name='us-east-1'))
+        mock_client.describe_endpoint.return_value = {'EndpointStatus': 'InService'}
+        
+        with patch('app._sagemaker_client', mock_client):
+            for _ in range(3):
+                response = self.app.get('/health')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_json()['status'], 'healthy')
+        
+        mock_client.describe_endpoint.assert_called_once()
+    
+    def test_health_check_caches_failures(self):
+        """Test that a failed endpoint probe is also reused within HEALTH_FAILURE_TTL."""
+        mock_client = MagicMock(spec=boto3.client('sagemaker', region_name='us-east-1'))
+        mock_client.describe_endpoint.side_effect = RuntimeError('endpoint not found')
+        
+        with patch('app._sagemaker_client', mock_client):
+            for _ in range(3):
+                response = self.app.get('/health')
+                self.assertEqual(response.status_code, 500)
+                self.assertEqual(response.get_json()['error'], 'endpoint not found')
+        
+        mock_client.describe_endpoint.assert_called_once()
+    
+    def test_micro_batcher_coalesces_requests(self):
+        """Test that concurrently submitted rows share one endpoint call."""
+        invoke_fn = MagicMock(side_effect=lambda rows: [row[0] for row in rows])
+        batcher = MicroBatcher(invoke_fn, batch_size=3, batch_timeout_ms=1000)
+        
+        futures = [batcher.submit([i]) for i in range(3)]
+        
+        self.assertEqual([f.result(timeout=5) for f in futures], [0, 1, 2])
+        invoke_fn.assert_called_once_with([[0], [1], [2]])
+
+SAMPLE_FEATURES = [1000, 1, 1.5, 1, 5, 1, 16, 0.1, 150, 4, 8, 1000, 2000, 2000, 10, 5, 10, 1, 1, 1]
+
+class TestCliSummarize(unittest.TestCase):
+    """Test cases for the CLI metrics summary helper."""
+    
+    def test_summarize_matches_per_field_results(self):
+        """Test that the single pass matches min, max and mean computed separately."""
+        history = [
+            {'cpu_percent': 12.5, 'total_requests': 40},
+            {'cpu_percent': 3.0, 'total_requests': 10},
+            {'cpu_percent': 47.25, 'total_requests': 25},
+            {'cpu_percent': 20.0, 'total_requests': 10},
+        ]
+        
+        for field in ('cpu_percent', 'total_requests'):
+            values = [m[field] for m in history]
+            low, high, avg = summarize(m[field] for m in history)
+            self.assertEqual((low, high), (min(values), max(values)))
+            self.assertAlmostEqual(avg, sum(values) / len(values))
+        
+        self.assertEqual(summarize([7]), (7, 7, 7.0))
+        self.assertIsNone(summarize([]))
+        self.assertIsNone(summarize(m['cpu_percent'] for m in []))
+
+class TestDeployRequirementsSentinel(unittest.TestCase):
+    """Test cases for skipping unchanged dependency installs in deploy.py."""
+    
+    def setUp(self):
+        """Run each test in an empty working directory."""
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+        with open('requirements.txt', 'w') as f:
+            f.write('flask==3.0.0\n')
+    
+    def tearDown(self):
+        """Restore the working directory."""
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+    
+    def install(self):
+        """Run install_dependencies with pip mocked; return the number of pip runs."""
+        with patch('deploy.subprocess.Popen') as popen, contextlib.redirect_stdout(io.StringIO()):
+            popen.return_value.stdout = []
+            popen.return_value.returncode = 0
+            self.assertTrue(deploy.install_dependencies())
+        return popen.call_count
+    
+    def test_install_skipped_only_when_unchanged(self):
+        """Test that the sentinel skips pip until requirements or the interpreter change."""
+        self.assertEqual(self.install(), 1)
+        self.assertEqual(self.install(), 0)
+        
+        with open('requirements.txt', 'a') as f:
+            f.write('orjson==3.10.0\n')
+        self.assertEqual(self.install(), 1)
+        self.assertEqual(self.install(), 0)
+        
+        with patch('deploy.sys.executable', '/opt/other-venv/bin/python'):
+            self.assertEqual(self.install(), 1)
+            self.assertEqual(self.install(), 0)
+
+class TestPredictionCache(unittest.TestCase):
+    """Test cases for the SQLite prediction cache."""
+    
+    def setUp(self):
+        """Create a cache in a temporary database."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'predictions.db')
+        self.cache = PredictionCache(self.db_path)
+    
+    def tearDown(self):
+        """Stop the writer thread and remove the temporary database."""
+        self.cache._drain_writes()
+        self.cache._conn().close()
+        self.tmpdir.cleanup()
+    
+    def query(self, sql, params=()):
+        """Run a query on a separate connection and return the first row."""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql, params).fetchone()
+    
+    def test_upsert_increments_access_count(self):
+        """Test that caching the same features again counts another access."""
+        self.cache.cache_prediction(SAMPLE_FEATURES, 2, "Upper mid-range phone", 80.0)
+        self.cache.cache_prediction(SAMPLE_FEATURES, 2, "Upper mid-range phone", 80.0)
+        
+        self.assertEqual(self.query('SELECT COUNT(*), access_count FROM predictions'), (1, 2))
+    
+    def test_writer_batches_queued_writes(self):
+        """Test that queued log rows are written in batches of at most WRITE_BATCH_SIZE."""
+        with patch.object(PredictionCache, '_write_batch', autospec=True,
+                          side_effect=PredictionCache._write_batch) as write_batch:
+            for i in range(300):
+                self.cache.log_prediction('session', 'hash', i % 4, 1.0, True)
+            self.cache._drain_writes()
+        
+        self.assertEqual(self.query('SELECT COUNT(*) FROM prediction_logs'), (300,))
+        batch_sizes = [len(call.args[1]) for call in write_batch.call_args_list]
+        self.assertLess(len(batch_sizes), 300)
+        self.assertLessEqual(max(batch_sizes), database.WRITE_BATCH_SIZE)
+        self.assertEqual(self.cache.dropped_writes, 0)
+    
+    def test_full_write_queue_drops_writes(self):
+        """Test that writes beyond the queue capacity are dropped and counted."""
+        with patch('database.WRITE_QUEUE_SIZE', 2):
+            cache = PredictionCache(self.db_path)
+        
+        # No writer thread, so nothing empties the queue
+        with patch.object(cache, '_ensure_writer'):
+            results = [cache.update_session_activity('session') for _ in range(5)]
+        
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(cache.dropped_writes, 3)
+    
+    def test_failed_write_batch_counts_dropped_rows(self):
+        """Test that a batch failing twice is counted in dropped_writes."""
+        self.cache._write_batch([('INSERT INTO missing_table VALUES (?)', (1,))] * 3)
+        
+        self.assertEqual(self.cache.dropped_writes, 3)
+    
+    def test_cache_hits_are_deferred(self):
+        """Test that hits are written by flush_hits or the writer, not by the lookup."""
+        self.cache.cache_prediction(SAMPLE_FEATURES, 2, "Upper mid-range phone", 80.0)
+        
+        for _ in range(3):
+            self.assertEqual(self.cache.get_cached_prediction(SAMPLE_FEATURES)['prediction'], 2)
+        self.assertEqual(self.query('SELECT access_count FROM predictions'), (1,))
+        
+        self.cache.flush_hits()
+        self.assertEqual(self.query('SELECT access_count FROM predictions'), (4,))
+        
+        # Reaching the threshold queues the bumps for the writer thread
+        with patch.object(self.cache, '_ensure_writer'):
+            for _ in range(database.HIT_FLUSH_THRESHOLD):
+                self.cache.get_cached_prediction(SAMPLE_FEATURES)
+        self.assertEqual(self.cache._write_q.get_nowait(),
+                         (database.SQL_ADD_HITS, (database.HIT_FLUSH_THRESHOLD,
+                                                  self.cache.get_feature_hash(SAMPLE_FEATURES))))
+        self.assertEqual(self.query('SELECT access_count FROM predictions'), (4,))
+    
+    def test_schema_version_gate(self):
+        """Test that a current database skips the schema script and an old one is upgraded."""
+        self.assertEqual(self.query('PRAGMA user_version'), (database.CURRENT_SCHEMA_VERSION,))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DROP INDEX idx_created_at')
+        
+        PredictionCache(self.db_path)
+        self.assertIsNone(self.query("SELECT name FROM sqlite_master WHERE name = 'idx_created_at'"))
+        
+        # Version 1 had idx_feature_hash instead of the covering lookup index
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DROP INDEX idx_pred_lookup')
+            conn.execute('CREATE INDEX idx_feature_hash ON predictions(feature_hash)')
+            conn.execute('PRAGMA user_version = 1')
+        
+        PredictionCache(self.db_path)
+        indexes = {row[0] for row in sqlite3.connect(self.db_path).execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn('idx_pred_lookup', indexes)
+        self.assertIn('idx_created_at', indexes)
+        self.assertNotIn('idx_feature_hash', indexes)
+        self.assertEqual(self.query('PRAGMA user_version'), (database.CURRENT_SCHEMA_VERSION,))
+    
+    def test_lookup_uses_covering_index(self):
+        """Test that cache lookups are planned on idx_pred_lookup."""
+        plan = self.query('EXPLAIN QUERY PLAN ' + database.SQL_SELECT_PRED, ('hash',))
+        
+        self.assertIn('COVERING INDEX idx_pred_lookup', plan[-1])
+
+class TestMetricsCollector(unittest.TestCase):
+    """Test cases for the metrics ring buffers and collector."""
+    
+    def setUp(self):
+        """Create a collector without its background thread."""
+        with patch.object(Config, 'METRICS_ENABLED', False):
+            self.collector = MetricsCollector(max_history=3)
+    
+    def test_metric_ring_wraps_in_order(self):
+        """Test that a full ring keeps the newest records in chronological order."""
+        ring = MetricRing(3, {'timestamp': 'd', 'value': 'q'})
+        for i in range(1, 6):
+            ring.append({'timestamp': float(i), 'value': i * 10})
+        
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(list(ring.column('value')), [30, 40, 50])
+        self.assertEqual(ring.last(), {'timestamp': 5.0, 'value': 50})
+        self.assertEqual([list(c) for c in ring.select(['value'], after=3.5)], [[40, 50]])
+        self.assertEqual([r['value'] for r in ring.records(after=4.0)], [50])
+        self.assertEqual(len(list(ring.records())), 3)
+    
+    def test_response_time_average_and_trend(self):
+        """Test the response-time EWMAs and the trend labels."""
+        # A slow first request does not dominate the warm-up average
+        self.collector.record_request(500.0, True)
+        for _ in range(100):
+            self.collector.record_request(50.0, True)
+        self.assertAlmostEqual(self.collector._avg_rt, 5500.0 / 101)
+        self.assertEqual(self.collector._response_time_trend(), 'stable')
+        
+        for _ in range(10):
+            self.collector.record_request(300.0, False)
+        self.assertEqual(self.collector._response_time_trend(), 'increasing')
+        
+        self.assertEqual(_slope_label([0, 10], 1.0), 'increasing')
+        self.assertEqual(_slope_label([10, 0], 1.0), 'decreasing')
+        self.assertEqual(_slope_label([5], 1.0), 'stable')
+    
+    def test_record_request_batch(self):
+        """Test that a batch matches the same calls to record_request."""
+        times = [120.0, 80.0, 95.5, 300.0, 10.0]
+        successes = [True, False, True, True, False]
+        with patch.object(Config, 'METRICS_ENABLED', False):
+            single = MetricsCollector()
+        for response_time, success in zip(times, successes):
+            single.record_request(response_time, success)
+        
+        self.collector.record_request_batch(times, successes)
+        
+        batched = self.collector._application_record()
+        expected = single._application_record()
+        self.assertAlmostEqual(batched.pop('average_response_time'), expected.pop('average_response_time'))
+        batched.pop('timestamp')
+        expected.pop('timestamp')
+        self.assertEqual(batched, expected)
+        
+        with self.assertRaises(ValueError):
+            self.collector.record_request_batch([1.0, 2.0], [True])
+    
+    def test_error_ring_keeps_newest_in_order(self):
+        """Test that the error ring reports the newest errors oldest first after wrapping."""
+        with self.assertLogs('monitoring', level='ERROR'):
+            for i in range(5):
+                self.collector.record_error(f'Error{i}', 'boom')
+        
+        errors = self.collector.get_current_metrics()['errors']
+        self.assertEqual(errors['total_errors'], 3)
+        self.assertEqual([e['type'] for e in errors['recent_errors']], ['Error2', 'Error3', 'Error4'])
+    
+    def test_current_metrics_snapshot_ttl(self):
+        """Test that get_current_metrics reuses its snapshot within the TTL."""
+        with patch.object(Config, 'METRICS_SNAPSHOT_TTL', 60):
+            first = self.collector.get_current_metrics()
+            self.collector.record_request(50.0, True)
+            self.assertIs(self.collector.get_current_metrics(), first)
+        
+        with patch.object(Config, 'METRICS_SNAPSHOT_TTL', 0):
+            current = self.collector.get_current_metrics()
+        self.assertEqual(current['application']['current']['total_requests'], 1)
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
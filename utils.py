@@ -3,11 +3,48 @@ Utility functions for the Mobile Price Predictor application.
 """
 
 import logging
+import struct
 from typing import List, Tuple, Union
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Model input schema: (feature name, type) in the order expected by the model
+FEATURE_SCHEMA = (
+    ('battery_power', int),
+    ('blue', int),
+    ('clock_speed', float),
+    ('dual_sim', int),
+    ('fc', int),
+    ('four_g', int),
+    ('int_memory', int),
+    ('m_dep', float),
+    ('mobile_wt', int),
+    ('n_cores', int),
+    ('pc', int),
+    ('px_height', int),
+    ('px_width', int),
+    ('ram', int),
+    ('sc_h', int),
+    ('sc_w', int),
+    ('talk_time', int),
+    ('three_g', int),
+    ('touch_screen', int),
+    ('wifi', int),
+)
+
+def parse_form_features(form) -> List[Union[int, float]]:
+    """
+    Parse feature values from a submitted form using FEATURE_SCHEMA.
+    
+    Args:
+        form: Mapping of form field names to string values
+        
+    Returns:
+        List of typed feature values in model order
+    """
+    return [caster(form[name]) for name, caster in FEATURE_SCHEMA]
+
 def validate_features(features: List[Union[int, float]]) -> Tuple[bool, str]:
     """
     Validate input features for mobile phone prediction.
@@ -22,21 +59,13 @@ def validate_features(features: List[Union[int, float]]) -> Tuple[bool, str]:
         return False, f"Expected 20 features, got {len(features)}"
     
     # Check for negative values
-    if any(f < 0 for f in features):
+    if min(features) < 0:
         return False, "All features must be non-negative"
     
     # Validate specific feature ranges
-    battery_power = features[0]
-    if not (Config.MIN_BATTERY_POWER <= battery_power <= Config.MAX_BATTERY_POWER):
-        return False, f"Battery power must be between {Config.MIN_BATTERY_POWER} and {Config.MAX_BATTERY_POWER}"
-    
-    clock_speed = features[2]
-    if not (Config.MIN_CLOCK_SPEED <= clock_speed <= Config.MAX_CLOCK_SPEED):
-        return False, f"Clock speed must be between {Config.MIN_CLOCK_SPEED} and {Config.MAX_CLOCK_SPEED}"
-    
-    ram = features[13]
-    if not (Config.MIN_RAM <= ram <= Config.MAX_RAM):
-        return False, f"RAM must be between {Config.MIN_RAM} and {Config.MAX_RAM}"
+    for index, label, low, high in Config.FEATURE_RANGES:
+        if not (low <= features[index] <= high):
+            return False, f"{label} must be between {low} and {high}"
     
     return True, ""
 
@@ -50,17 +79,36 @@ def preprocess_features(features: List[Union[int, float]]) -> List[Union[int, fl
     Returns:
         Preprocessed feature values
     """
-    # Convert to appropriate types
-    processed = []
-    for i, feature in enumerate(features):
-        if i in [2, 7]:  # clock_speed and m_dep are floats
-            processed.append(float(feature))
-        else:
-            processed.append(int(feature))
+    # Convert to the types declared in the feature schema
+    processed = [caster(feature) for (_, caster), feature in zip(FEATURE_SCHEMA, features)]
     
     logger.info(f"Preprocessed {len(processed)} features")
     return processed
 
+def pack_features(features: List[Union[int, float]]) -> bytes:
+    """
+    Pack feature values into a canonical byte string (little-endian doubles).
+    
+    Feature vectors that are numerically equal pack to the same bytes,
+    so the result is suitable as a cache key.
+    
+    Args:
+        features: Feature values
+        
+    Returns:
+        Packed feature bytes
+    """
+    return struct.pack(f'<{len(features)}d', *features)
+
+# Model prediction -> (prediction_text, prediction_image)
+PREDICTION_RESULTS = {
+    0: ("Budget mobile phone", "budget.jpg"),
+    1: ("Lower mid-range phone", "lower-mid.jpg"),
+    2: ("Upper mid-range phone", "upper-mid.jpg"),
+    3: ("Premium phone", "premium.png")
+}
+UNKNOWN_PREDICTION_RESULT = ("Unknown prediction result", "placeholder.svg")
+
 def format_prediction_result(prediction: int) -> Tuple[str, str]:
     """
     Format prediction result for display.
@@ -71,11 +119,4 @@ def format_prediction_result(prediction: int) -> Tuple[str, str]:
     Returns:
         Tuple of (prediction_text, prediction_image)
     """
-    prediction_map = {
-        0: ("Budget mobile phone", "budget.jpg"),
-        1: ("Lower mid-range phone", "lower-mid.jpg"),
-        2: ("Upper mid-range phone", "upper-mid.jpg"),
-        3: ("Premium phone", "premium.png")
-    }
-    
-    return prediction_map.get(prediction, ("Unknown prediction result", "placeholder.svg")) 
\ No newline at end of file
+    return PREDICTION_RESULTS.get(prediction, UNKNOWN_PREDICTION_RESULT) 
\ No newline at end of file